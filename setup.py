@@ -19,10 +19,15 @@
         "Operating System :: OS Independent",
     ],
     python_requires=">=3.8",
+    entry_points={
+        "console_scripts": [
+            "medtranscluster=src.pipeline:main",
+        ],
+    },
     install_requires=[
         "numpy>=1.19.2",
         "pandas>=1.2.0",
-        "tensorflow>=2.4.0",
+        "tensorflow>=2.7.0",
         "scikit-learn>=0.24.0",
         "matplotlib>=3.3.0",
         "seaborn>=0.11.0",
@@ -1,32 +1,126 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 from sklearn.metrics import silhouette_score, calinski_harabasz_score, davies_bouldin_score
+from .metrics import centroid_scores, chunked_silhouette, subsampled_silhouette
+from .utils import limit_blas_threads
 import time
 
+SILHOUETTE_MODES = ('exact', 'chunked', 'subsample')
+
+def _score_task(features_path, labels, analyzer_kwargs):
+    """Score one (model, method) pair in a worker on memmapped features"""
+    features = np.load(features_path, mmap_mode='r')
+    start = time.perf_counter()
+    scores = ModelAnalyzer(**analyzer_kwargs)._score(features, labels)
+    return scores, time.perf_counter() - start
+
 class ModelAnalyzer:
-    def __init__(self):
+    def __init__(self, silhouette='exact', sample_size=5000, n_repeats=5, chunk_size=1000,
+                 random_state=0):
+        if silhouette not in SILHOUETTE_MODES:
+            raise ValueError(f"Unknown silhouette mode '{silhouette}', expected one of {SILHOUETTE_MODES}")
         self.results = {}
-        
-    def analyze_model(self, model_name, features, clustering_results):
-        """Analyze clustering results for a specific model"""
+        # 'exact' uses sklearn as before; 'chunked' and 'subsample' use the
+        # bounded-memory engine in metrics.py, with CH/DB from centroid statistics
+        self.silhouette = silhouette
+        self.sample_size = sample_size
+        self.n_repeats = n_repeats
+        self.chunk_size = chunk_size
+        self.random_state = random_state
+
+    def _config(self):
+        return {
+            'silhouette': self.silhouette,
+            'sample_size': self.sample_size,
+            'n_repeats': self.n_repeats,
+            'chunk_size': self.chunk_size,
+            'random_state': self.random_state
+        }
+
+    def _score(self, features, labels):
+        if self.silhouette == 'exact':
+            return {
+                'silhouette': silhouette_score(features, labels),
+                'calinski': calinski_harabasz_score(features, labels),
+                'davies': davies_bouldin_score(features, labels)
+            }
+
+        scores = centroid_scores(features, labels)
+        if self.silhouette == 'chunked':
+            scores['silhouette'] = chunked_silhouette(features, labels, self.chunk_size)
+        else:
+            estimate = subsampled_silhouette(features, labels, self.sample_size, self.n_repeats,
+                                             random_state=self.random_state)
+            scores['silhouette'] = estimate['silhouette']
+            scores['silhouette_ci'] = (estimate['ci_low'], estimate['ci_high'])
+        return scores
+
+    def analyze_model(self, model_name, features, clustering_results, context=None):
+        """Analyze clustering results for a specific model.
+
+        Pass an EvaluationContext built on ``features`` to reuse its cached
+        distance structures across all methods instead of recomputing them.
+        """
         model_metrics = {
             'n_features': features.shape[1],
             'processing_time': 0,
             'clustering_scores': {}
         }
-        
+
+        start = time.perf_counter()
         for method, labels in clustering_results.items():
             if len(np.unique(labels)) > 1:
-                scores = {
-                    'silhouette': silhouette_score(features, labels),
-                    'calinski': calinski_harabasz_score(features, labels),
-                    'davies': davies_bouldin_score(features, labels)
-                }
-                model_metrics['clustering_scores'][method] = scores
-                
+                if context is not None:
+                    model_metrics['clustering_scores'][method] = context.scores(labels)
+                else:
+                    model_metrics['clustering_scores'][method] = self._score(features, labels)
+        model_metrics['processing_time'] = time.perf_counter() - start
+        if context is not None:
+            model_metrics['distance_stats'] = context.stats()
+
         self.results[model_name] = model_metrics
         return model_metrics
-    
+
+    def analyze_all(self, feature_paths, clustering_results, n_jobs=None, blas_threads=1):
+        """Analyze every model x method combination concurrently.
+
+        ``feature_paths`` maps model names to ``.npy`` feature files, which
+        workers open with ``mmap_mode='r'`` rather than receiving a pickled
+        copy; ``clustering_results`` maps model names to ``{method: labels}``.
+        Results land in ``self.results`` exactly as sequential
+        ``analyze_model`` calls would leave them.
+        """
+        n_jobs = n_jobs or os.cpu_count() or 1
+        config = self._config()
+        with ProcessPoolExecutor(max_workers=n_jobs, initializer=limit_blas_threads,
+                                 initargs=(blas_threads,)) as pool:
+            futures = {
+                (model_name, method): pool.submit(_score_task, feature_paths[model_name],
+                                                  np.asarray(labels), config)
+                for model_name, methods in clustering_results.items()
+                for method, labels in methods.items()
+                if len(np.unique(labels)) > 1
+            }
+
+            # Assemble in input order so the report matches a sequential run
+            for model_name, methods in clustering_results.items():
+                features = np.load(feature_paths[model_name], mmap_mode='r')
+                model_metrics = {
+                    'n_features': features.shape[1],
+                    'processing_time': 0,
+                    'clustering_scores': {}
+                }
+                for method in methods:
+                    if (model_name, method) not in futures:
+                        continue
+                    scores, elapsed = futures[(model_name, method)].result()
+                    model_metrics['clustering_scores'][method] = scores
+                    model_metrics['processing_time'] += elapsed
+                self.results[model_name] = model_metrics
+        return self.results
+
     def generate_comparison_report(self):
         """Generate comprehensive comparison report"""
         # Create list to store rows
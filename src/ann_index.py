@@ -0,0 +1,149 @@
+import os
+import numpy as np
+from scipy import sparse
+from sklearn.cluster import MiniBatchKMeans
+from .clustering import iter_feature_chunks
+
+def _squared_distances(queries, vectors, vector_norms=None):
+    """Squared euclidean distances between two row sets via a single GEMM"""
+    if vector_norms is None:
+        vector_norms = np.einsum('ij,ij->i', vectors, vectors)
+    query_norms = np.einsum('ij,ij->i', queries, queries)
+    d2 = query_norms[:, None] + vector_norms[None, :] - 2.0 * queries @ vectors.T
+    return np.maximum(d2, 0.0, out=d2)
+
+class IVFIndex:
+    """Inverted-file approximate nearest-neighbour index over feature vectors.
+
+    Vectors are bucketed by their nearest coarse centroid; a query only scans
+    the ``n_probe`` buckets whose centroids are closest to it, so search and
+    radius-graph construction cost roughly ``n_probe / n_lists`` of brute force.
+    """
+
+    def __init__(self, n_lists=None, n_probe=8):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.centroids = None
+        self.list_offsets = None
+        self.ids = None
+        self.vectors = None
+        self.norms = None
+
+    def __len__(self):
+        return 0 if self.ids is None else len(self.ids)
+
+    def build(self, source, chunk_size=10000):
+        """Train coarse centroids and bucket every vector (array, memmap or FeatureStore)"""
+        n_total = len(source)
+        n_lists = self.n_lists or max(1, int(np.sqrt(n_total)))
+        quantizer = MiniBatchKMeans(n_clusters=n_lists, batch_size=max(chunk_size, n_lists))
+        for chunk in iter_feature_chunks(source, chunk_size):
+            if len(chunk) >= n_lists:
+                quantizer.partial_fit(chunk)
+        self.centroids = quantizer.cluster_centers_.astype(np.float32)
+        self.n_lists = len(self.centroids)
+
+        assignments = np.concatenate([quantizer.predict(chunk)
+                                      for chunk in iter_feature_chunks(source, chunk_size)])
+        order = np.argsort(assignments, kind='stable')
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.list_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        self.ids = order.astype(np.int64)
+
+        n_features = self.centroids.shape[1]
+        self.vectors = np.empty((n_total, n_features), dtype=np.float32)
+        position = np.empty(n_total, dtype=np.int64)
+        position[order] = np.arange(n_total)
+        offset = 0
+        for chunk in iter_feature_chunks(source, chunk_size):
+            self.vectors[position[offset:offset + len(chunk)]] = chunk
+            offset += len(chunk)
+        self.norms = np.einsum('ij,ij->i', self.vectors, self.vectors)
+        return self
+
+    def _probe_lists(self, queries):
+        d2 = _squared_distances(queries, self.centroids)
+        n_probe = min(self.n_probe, self.n_lists)
+        return np.argpartition(d2, n_probe - 1, axis=1)[:, :n_probe]
+
+    def _candidates(self, lists):
+        slices = [np.arange(self.list_offsets[l], self.list_offsets[l + 1]) for l in lists]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def query(self, queries, k=10):
+        """Return (distances, ids) of the k approximate nearest neighbours of each query"""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, lists in enumerate(self._probe_lists(queries)):
+            positions = self._candidates(lists)
+            if len(positions) == 0:
+                continue
+            d2 = _squared_distances(queries[row:row + 1], self.vectors[positions],
+                                    self.norms[positions])[0]
+            top = min(k, len(positions))
+            best = np.argpartition(d2, top - 1)[:top]
+            best = best[np.argsort(d2[best])]
+            distances[row, :top] = np.sqrt(d2[best])
+            ids[row, :top] = self.ids[positions[best]]
+        return distances, ids
+
+    def radius_neighbors_graph(self, eps):
+        """Sparse (N, N) distance graph of all pairs within eps, for DBSCAN(metric='precomputed')
+
+        Points in the same bucket share one probe set (the buckets nearest to
+        their centroid), so each bucket is handled with one blocked GEMM.
+        """
+        rows, cols, data = [], [], []
+        eps2 = eps * eps
+        probes = self._probe_lists(self.centroids)
+        for lst in range(self.n_lists):
+            start, end = self.list_offsets[lst], self.list_offsets[lst + 1]
+            if start == end:
+                continue
+            candidates = self._candidates(probes[lst])
+            d2 = _squared_distances(self.vectors[start:end], self.vectors[candidates],
+                                    self.norms[candidates])
+            q, c = np.nonzero(d2 <= eps2)
+            rows.append(self.ids[start + q])
+            cols.append(self.ids[candidates[c]])
+            data.append(np.sqrt(d2[q, c]))
+        n = len(self)
+        if not rows:
+            return sparse.csr_matrix((n, n), dtype=np.float32)
+        rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+        # Probe sets are not symmetric, so keep an edge if either side found it. Built from
+        # COO rather than graph.maximum(graph.T), which drops zero distances (duplicate images)
+        all_rows, all_cols = np.concatenate([rows, cols]), np.concatenate([cols, rows])
+        _, first = np.unique(all_rows * n + all_cols, return_index=True)
+        return sparse.csr_matrix((np.concatenate([data, data])[first], (all_rows[first], all_cols[first])),
+                                 shape=(n, n), dtype=np.float32)
+
+    def save(self, path):
+        tmp_path = path + '.tmp.npz'
+        np.savez(tmp_path, centroids=self.centroids, list_offsets=self.list_offsets,
+                 ids=self.ids, vectors=self.vectors, n_probe=self.n_probe)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        index = cls(n_lists=len(data['centroids']), n_probe=int(data['n_probe']))
+        index.centroids = data['centroids']
+        index.list_offsets = data['list_offsets']
+        index.ids = data['ids']
+        index.vectors = data['vectors']
+        index.norms = np.einsum('ij,ij->i', index.vectors, index.vectors)
+        return index
+
+def build_or_load_index(store, n_lists=None, n_probe=8, chunk_size=10000):
+    """Load the IVF index persisted next to a FeatureStore, building it on first use"""
+    # Keyed by the store fingerprint so a rewritten store of the same size is not served stale vectors
+    path = os.path.join(store.root, f'ivf_index_{n_lists}_{store.fingerprint()[:12]}.npz')
+    if os.path.exists(path):
+        index = IVFIndex.load(path)
+        index.n_probe = n_probe
+        return index
+    index = IVFIndex(n_lists=n_lists, n_probe=n_probe).build(store, chunk_size)
+    index.save(path)
+    return index
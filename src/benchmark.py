@@ -0,0 +1,279 @@
+import sys
+import time
+import subprocess
+import numpy as np
+import pandas as pd
+
+def _images_per_second(n_images, elapsed):
+    return n_images / elapsed if elapsed > 0 else float('inf')
+
+def benchmark_extraction(extractor, image_paths, batch_sizes=(1, 8, 32, 64)):
+    """Compare images/sec of the per-image path against batched extraction"""
+    rows = []
+
+    # Warm up so graph tracing is not counted against the first timing
+    extractor.extract_batch(image_paths[:1], batch_size=1)
+
+    # Baseline: the original per-image Keras predict() call
+    start = time.perf_counter()
+    for img_path in image_paths:
+        x = np.expand_dims(extractor._load_image(img_path), axis=0)
+        extractor.model.predict(extractor._prepare(x))
+    elapsed = time.perf_counter() - start
+    rows.append({
+        'Mode': 'per-image predict',
+        'Batch Size': 1,
+        'Seconds': elapsed,
+        'Images/sec': _images_per_second(len(image_paths), elapsed)
+    })
+
+    for batch_size in batch_sizes:
+        start = time.perf_counter()
+        extractor.extract_batch(image_paths, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+        rows.append({
+            'Mode': 'extract_batch',
+            'Batch Size': batch_size,
+            'Seconds': elapsed,
+            'Images/sec': _images_per_second(len(image_paths), elapsed)
+        })
+
+    return pd.DataFrame(rows)
+
+def benchmark_pooling(image_paths, model_names=('vgg16', 'resnet50', 'inception'),
+                      poolings=('flatten', 'avg', 'max', 'gem'), n_clusters=5):
+    """Report embedding size and KMeans time per backbone and pooling on a fixed sample"""
+    from sklearn.cluster import KMeans
+    from .data_pipeline import PrefetchLoader
+    from .feature_extractor import FeatureExtractor, pool_features
+
+    rows = []
+    for model_name in model_names:
+        extractor = FeatureExtractor(model_name=model_name)
+        # Run the backbone once and pool the same conv maps every way
+        loader = PrefetchLoader(extractor._load_image, batch_size=extractor.batch_size)
+        conv_maps = np.concatenate([np.asarray(extractor._forward(batch))
+                                    for _, batch in loader(image_paths)], axis=0)
+
+        for pooling in poolings:
+            features = pool_features(conv_maps, pooling, extractor.gem_p)
+            start = time.perf_counter()
+            KMeans(n_clusters=n_clusters, random_state=0, n_init=10).fit(features)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                'Model': model_name,
+                'Pooling': pooling,
+                'Number of Features': features.shape[1],
+                'Memory (MB)': features.nbytes / 1024 ** 2,
+                'Clustering Time (s)': elapsed
+            })
+
+    report = pd.DataFrame(rows)
+    flat = report[report['Pooling'] == 'flatten'].set_index('Model')
+    if not flat.empty:
+        report['Memory Saving'] = report.apply(
+            lambda r: flat.loc[r['Model'], 'Memory (MB)'] / r['Memory (MB)'], axis=1)
+        report['Clustering Speedup'] = report.apply(
+            lambda r: flat.loc[r['Model'], 'Clustering Time (s)'] / r['Clustering Time (s)'], axis=1)
+    return report
+
+STARTUP_PATHS = {
+    'clustering-only': ['src.checkpoint_manager', 'src.clustering', 'src.analysis'],
+    'reporting-only': ['src.results_analyzer', 'src.comprehensive_evaluator',
+                       'src.final_report_generator', 'src.visualization'],
+    'extraction': ['src.feature_extractor']
+}
+
+def benchmark_import_time(paths=None, repeats=3):
+    """Measure cold-start import time of each entry path in a fresh interpreter"""
+    paths = paths or STARTUP_PATHS
+    rows = []
+    for name, modules in paths.items():
+        code = (
+            'import time; start = time.perf_counter(); '
+            + '; '.join(f'import {m}' for m in modules)
+            + '; print(time.perf_counter() - start)'
+        )
+        timings = []
+        for _ in range(repeats):
+            out = subprocess.run([sys.executable, '-c', code], capture_output=True,
+                                 text=True, check=True)
+            timings.append(float(out.stdout.strip()))
+        rows.append({
+            'Path': name,
+            'Modules': ', '.join(modules),
+            'Min Import Time (s)': min(timings),
+            'Mean Import Time (s)': sum(timings) / len(timings)
+        })
+    return pd.DataFrame(rows)
+
+def benchmark_inference_modes(image_paths, model_name='vgg16',
+                              modes=('eager', 'function', 'xla', 'savedmodel'),
+                              batch_size=32, repeats=3):
+    """Per-batch latency and images/sec of each inference mode on pre-decoded batches"""
+    from .data_pipeline import PrefetchLoader
+    from .feature_extractor import FeatureExtractor
+
+    rows = []
+    batches = None
+    for mode in modes:
+        extractor = FeatureExtractor(model_name=model_name, batch_size=batch_size,
+                                     inference_mode=mode)
+        if batches is None:
+            # Decode once so only inference is timed
+            loader = PrefetchLoader(extractor._load_image, batch_size=batch_size)
+            batches = [batch for _, batch in loader(image_paths)]
+
+        # First call traces/compiles the graph; report it separately
+        start = time.perf_counter()
+        np.asarray(extractor._forward(batches[0]))
+        warmup = time.perf_counter() - start
+
+        latencies = []
+        for _ in range(repeats):
+            for batch in batches:
+                start = time.perf_counter()
+                np.asarray(extractor._forward(batch))
+                latencies.append(time.perf_counter() - start)
+
+        total = sum(latencies)
+        rows.append({
+            'Mode': mode,
+            'Warmup (s)': warmup,
+            'Mean Batch Latency (ms)': 1000 * total / len(latencies),
+            'P95 Batch Latency (ms)': 1000 * float(np.percentile(latencies, 95)),
+            'Images/sec': _images_per_second(len(image_paths) * repeats, total)
+        })
+    return pd.DataFrame(rows)
+
+def benchmark_quantization(image_paths, model_name='vgg16', modes=(None, 'dynamic', 'float16', 'int8'),
+                           calibration_size=100, pooling='avg', n_clusters=5):
+    """Speedup and downstream clustering-score change of each quantization mode"""
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import silhouette_score, calinski_harabasz_score
+    from .feature_extractor import FeatureExtractor
+
+    rows = []
+    for mode in modes:
+        extractor = FeatureExtractor(model_name=model_name, pooling=pooling, quantization=mode,
+                                     calibration_paths=image_paths[:calibration_size])
+        # Build/convert outside the timed region
+        extractor.extract_batch(image_paths[:1])
+
+        start = time.perf_counter()
+        features = extractor.extract_batch(image_paths)
+        elapsed = time.perf_counter() - start
+
+        labels = KMeans(n_clusters=n_clusters, random_state=0, n_init=10).fit_predict(features)
+        rows.append({
+            'Quantization': mode or 'float32',
+            'Seconds': elapsed,
+            'Images/sec': _images_per_second(len(image_paths), elapsed),
+            'Silhouette Score': silhouette_score(features, labels),
+            'Calinski-Harabasz Score': calinski_harabasz_score(features, labels)
+        })
+
+    report = pd.DataFrame(rows)
+    baseline = report.iloc[0]
+    report['Speedup'] = baseline['Seconds'] / report['Seconds']
+    report['Silhouette Change'] = report['Silhouette Score'] - baseline['Silhouette Score']
+    report['Calinski-Harabasz Change'] = (report['Calinski-Harabasz Score']
+                                          - baseline['Calinski-Harabasz Score'])
+    return report
+
+def _inertia(source, labels, chunk_size=10000):
+    """Sum of squared distances to each cluster's mean, computed chunk-wise"""
+    from .clustering import iter_feature_chunks
+
+    sums, counts, offset = {}, {}, 0
+    for chunk in iter_feature_chunks(source, chunk_size):
+        chunk_labels = labels[offset:offset + len(chunk)]
+        for label in np.unique(chunk_labels):
+            rows = chunk[chunk_labels == label]
+            sums[label] = sums.get(label, 0) + rows.sum(axis=0, dtype=np.float64)
+            counts[label] = counts.get(label, 0) + len(rows)
+        offset += len(chunk)
+    centers = {label: sums[label] / counts[label] for label in sums}
+
+    inertia, offset = 0.0, 0
+    for chunk in iter_feature_chunks(source, chunk_size):
+        chunk_labels = labels[offset:offset + len(chunk)]
+        for label in np.unique(chunk_labels):
+            diff = chunk[chunk_labels == label] - centers[label]
+            inertia += float(np.einsum('ij,ij->', diff, diff))
+        offset += len(chunk)
+    return inertia
+
+def benchmark_streaming_clustering(source, n_clusters=5, chunk_size=10000,
+                                   methods=('kmeans', 'minibatch_kmeans', 'birch')):
+    """Time, peak traced memory and inertia of full-batch KMeans vs streaming methods"""
+    import tracemalloc
+    from .clustering import ImageClustering
+
+    rows = []
+    for method in methods:
+        clustering = ImageClustering(method=method, n_clusters=n_clusters)
+        tracemalloc.start()
+        start = time.perf_counter()
+        if method == 'kmeans':
+            features = (source.load(mmap=False)[0] if hasattr(source, 'load')
+                        else np.asarray(source, dtype=np.float32))
+            labels = clustering.fit_predict(features)
+            del features
+        else:
+            labels = clustering.fit_predict_stream(source, chunk_size)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rows.append({
+            'Clustering Method': method,
+            'Seconds': elapsed,
+            'Peak Memory (MB)': peak / 1024 ** 2,
+            'Inertia': _inertia(source, labels, chunk_size)
+        })
+    return pd.DataFrame(rows)
+
+def benchmark_silhouette(features, labels, sample_sizes=(1000, 5000, 10000), n_repeats=5,
+                         chunk_size=1000, check_tolerance=1e-3):
+    """Time and silhouette estimate of the chunked/subsampled engines vs sklearn's exact score.
+
+    The chunked and EvaluationContext engines are exact, so they are checked
+    against sklearn and an AssertionError is raised beyond check_tolerance.
+    """
+    from sklearn.metrics import silhouette_score
+    from .metrics import chunked_silhouette, subsampled_silhouette
+    from .evaluation_context import EvaluationContext
+
+    rows = []
+    start = time.perf_counter()
+    exact = silhouette_score(features, labels)
+    exact_time = time.perf_counter() - start
+    rows.append({'Mode': 'exact', 'Sample Size': len(labels), 'Silhouette Score': exact,
+                 'CI Low': exact, 'CI High': exact, 'Seconds': exact_time})
+
+    start = time.perf_counter()
+    score = chunked_silhouette(features, labels, chunk_size)
+    rows.append({'Mode': 'chunked', 'Sample Size': len(labels), 'Silhouette Score': score,
+                 'CI Low': score, 'CI High': score, 'Seconds': time.perf_counter() - start})
+
+    # Shared-distance path used by EvaluationContext.scores() and analyze_model(context=...)
+    start = time.perf_counter()
+    score = EvaluationContext(features, block_size=chunk_size).silhouette(labels)
+    rows.append({'Mode': 'context', 'Sample Size': len(labels), 'Silhouette Score': score,
+                 'CI Low': score, 'CI High': score, 'Seconds': time.perf_counter() - start})
+
+    for sample_size in sample_sizes:
+        start = time.perf_counter()
+        estimate = subsampled_silhouette(features, labels, sample_size, n_repeats)
+        rows.append({'Mode': 'subsample', 'Sample Size': sample_size,
+                     'Silhouette Score': estimate['silhouette'],
+                     'CI Low': estimate['ci_low'], 'CI High': estimate['ci_high'],
+                     'Seconds': time.perf_counter() - start})
+
+    report = pd.DataFrame(rows)
+    report['Abs Error'] = (report['Silhouette Score'] - exact).abs()
+    report['Speedup'] = exact_time / report['Seconds']
+    exact_modes = report[report['Mode'].isin(['chunked', 'context'])]
+    if (exact_modes['Abs Error'] > check_tolerance).any():
+        raise AssertionError(f"Exact silhouette engines disagree with sklearn:\n{exact_modes}")
+    return report
@@ -1,46 +1,167 @@
 import os
 import json
 import pickle
+import hashlib
+import threading
 import numpy as np
+from .feature_store import FeatureStore, atomic_write_json
 
 class CheckpointManager:
+    """Progress tracking and artifact storage under one checkpoint directory.
+
+    All progress updates go through an internal lock, so a single manager can
+    be shared by threads working on different models; share one instance per
+    directory rather than creating several.
+    """
+
     def __init__(self, checkpoint_dir='checkpoints'):
         self.checkpoint_dir = checkpoint_dir
+        self._lock = threading.RLock()
         os.makedirs(checkpoint_dir, exist_ok=True)
         self.progress_file = os.path.join(checkpoint_dir, 'progress.json')
         self.initialize_progress()
 
     def initialize_progress(self):
         """Initialize or load progress tracking"""
+        self.progress = None
         if os.path.exists(self.progress_file):
-            with open(self.progress_file, 'r') as f:
-                self.progress = json.load(f)
-        else:
+            try:
+                with open(self.progress_file, 'r') as f:
+                    self.progress = json.load(f)
+            except json.JSONDecodeError:
+                print(f"Warning: {self.progress_file} is corrupt, starting fresh")
+        if self.progress is None:
             self.progress = {
                 'completed_models': [],
                 'current_model': None,
                 'features_extracted': {}
             }
             self.save_progress()
+        self.progress.setdefault('extraction_shards', {})
 
     def save_progress(self):
-        """Save current progress"""
-        with open(self.progress_file, 'w') as f:
-            json.dump(self.progress, f)
+        """Save current progress atomically (write-temp + rename)"""
+        with self._lock:
+            atomic_write_json(self.progress_file, self.progress)
 
-    def save_features(self, model_name, features, image_paths):
+    def feature_store(self, model_name, dtype='float32'):
+        """Open the memory-mapped feature store for a model"""
+        return FeatureStore(os.path.join(self.checkpoint_dir, f'{model_name}_features'), dtype=dtype)
+
+    def save_features(self, model_name, features, image_paths, dtype='float32'):
         """Save extracted features for a model"""
-        features_file = os.path.join(self.checkpoint_dir, f'{model_name}_features.pkl')
-        with open(features_file, 'wb') as f:
-            pickle.dump({
-                'features': features,
-                'image_paths': image_paths
-            }, f)
-        self.progress['features_extracted'][model_name] = True
-        self.save_progress()
-
-    def load_features(self, model_name):
-        """Load saved features for a model"""
+        store = self.feature_store(model_name, dtype=dtype)
+        store.clear()
+        store.append(features, image_paths)
+        with self._lock:
+            self.progress['extraction_shards'].pop(model_name, None)
+            self.progress['features_extracted'][model_name] = True
+            self.save_progress()
+
+    def completed_shards(self, model_name):
+        """Return the [start, end) image ranges already extracted for a model"""
+        state = self.progress['extraction_shards'].get(model_name, {})
+        return sorted(tuple(shard['range']) for shard in state.get('shards', {}).values())
+
+    @staticmethod
+    def _shard_hash(image_paths, start, end, shard_paths):
+        """Hash of a shard's paths, sizes and mtimes (read from the manifest when given one)"""
+        if hasattr(image_paths, 'records'):
+            records = image_paths.records[start:end]
+            stamps = zip(records['size'].tolist(), records['mtime_ns'].tolist())
+        else:
+            stamps = ((st.st_size, st.st_mtime_ns) for st in map(os.stat, shard_paths))
+        digest = hashlib.sha1()
+        for path, (size, mtime_ns) in zip(shard_paths, stamps):
+            digest.update(f'{path}:{size}:{mtime_ns}\n'.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _extraction_state(self, model_name, shard_size, dtype):
+        """Return (store, state) for a model, resetting both if the shard size changed"""
+        store = self.feature_store(model_name, dtype=dtype)
+        with self._lock:
+            state = self.progress['extraction_shards'].get(model_name)
+
+            # Shard boundaries move with the shard size, so earlier shards can't be matched
+            if state is None or state['shard_size'] != shard_size or 'shards' not in state:
+                store.clear()
+                state = {'shard_size': shard_size, 'shards': {}}
+                self.progress['extraction_shards'][model_name] = state
+                self.progress['features_extracted'][model_name] = False
+        return store, state
+
+    def extract_features(self, extractor, image_paths, model_name=None,
+                         shard_size=1000, dtype='float32'):
+        """Extract features shard by shard, re-extracting only shards that changed.
+
+        Each shard is keyed by a hash of its paths, file sizes and mtimes, so
+        a resumed or extended job reuses every unchanged shard and only
+        extracts new or modified ones.
+
+        Accepts a FeatureExtractor (returns its FeatureStore) or a
+        MultiFeatureExtractor (returns {model_name: FeatureStore}).
+        ``image_paths`` may be a list or an ImageManifest; only one shard of
+        paths is decoded at a time.
+        """
+        multi = hasattr(extractor, 'model_names')
+        model_names = extractor.model_names if multi else [model_name or extractor.model_name]
+        jobs = {name: self._extraction_state(name, shard_size, dtype) for name in model_names}
+
+        with self._lock:
+            self.progress['current_model'] = ','.join(model_names)
+            self.save_progress()
+
+        n_shards = 0
+        for shard_id, start in enumerate(range(0, len(image_paths), shard_size)):
+            n_shards = shard_id + 1
+            end = min(start + shard_size, len(image_paths))
+            shard_paths = image_paths[start:end]
+            shard_hash = self._shard_hash(image_paths, start, end, shard_paths)
+            pending = [
+                name for name, (store, state) in jobs.items()
+                if state['shards'].get(str(shard_id), {}).get('hash') != shard_hash
+                or not store.has_shard(shard_id)
+            ]
+            if not pending:
+                continue
+
+            if multi:
+                features = extractor.extract_batch(shard_paths, model_names=pending)
+            else:
+                features = {pending[0]: extractor.extract_batch(shard_paths)}
+
+            for name in pending:
+                store, state = jobs[name]
+                store.append(features[name], shard_paths, shard_id=shard_id)
+                with self._lock:
+                    state['shards'][str(shard_id)] = {'range': [start, end], 'hash': shard_hash}
+            self.save_progress()
+            print(f"{', '.join(pending)}: extracted images {start}-{end} of {len(image_paths)}")
+
+        # Drop trailing shards left over from a longer image list
+        for store, state in jobs.values():
+            stale = {int(i) for i in state['shards']} | {int(s['name'][6:]) for s in store.index['shards']}
+            for shard_id in sorted(i for i in stale if i >= n_shards):
+                store.remove_shard(shard_id)
+                with self._lock:
+                    state['shards'].pop(str(shard_id), None)
+
+        with self._lock:
+            for name in model_names:
+                self.progress['features_extracted'][name] = True
+            self.progress['current_model'] = None
+            self.save_progress()
+
+        stores = {name: store for name, (store, _) in jobs.items()}
+        return stores if multi else stores[model_names[0]]
+
+    def load_features(self, model_name, mmap=True):
+        """Load saved features for a model (read-only memmap by default)"""
+        store_dir = os.path.join(self.checkpoint_dir, f'{model_name}_features')
+        if os.path.exists(os.path.join(store_dir, FeatureStore.INDEX_FILE)):
+            return FeatureStore(store_dir).load(mmap=mmap)
+
+        # Fall back to checkpoints written before the feature store existed
         features_file = os.path.join(self.checkpoint_dir, f'{model_name}_features.pkl')
         if os.path.exists(features_file):
             with open(features_file, 'rb') as f:
@@ -53,8 +174,10 @@ def save_clustering_results(self, model_name, results):
         results_file = os.path.join(self.checkpoint_dir, f'{model_name}_clustering.pkl')
         with open(results_file, 'wb') as f:
             pickle.dump(results, f)
-        self.progress['completed_models'].append(model_name)
-        self.save_progress()
+        with self._lock:
+            if model_name not in self.progress['completed_models']:
+                self.progress['completed_models'].append(model_name)
+            self.save_progress()
 
     def load_clustering_results(self, model_name):
         """Load saved clustering results"""
@@ -62,4 +185,52 @@ def load_clustering_results(self, model_name):
         if os.path.exists(results_file):
             with open(results_file, 'rb') as f:
                 return pickle.load(f)
-        return None 
\ No newline at end of file
+        return None
+
+    def save_centroids(self, model_name, centroids):
+        """Save {method: centroids} so the next run can warm-start from them"""
+        centroids_file = os.path.join(self.checkpoint_dir, f'{model_name}_centroids.npz')
+        tmp_file = centroids_file + '.tmp.npz'
+        np.savez(tmp_file, **{method: np.asarray(c) for method, c in centroids.items() if c is not None})
+        os.replace(tmp_file, centroids_file)
+
+    def load_centroids(self, model_name):
+        """Load saved centroids as {method: array}"""
+        centroids_file = os.path.join(self.checkpoint_dir, f'{model_name}_centroids.npz')
+        if os.path.exists(centroids_file):
+            with np.load(centroids_file) as data:
+                return {method: data[method] for method in data.files}
+        return None
+
+    def save_sweep_labels(self, model_name, run_labels):
+        """Save {run name: labels} from a clustering sweep as one npz"""
+        labels_file = os.path.join(self.checkpoint_dir, f'{model_name}_labels.npz')
+        tmp_file = labels_file + '.tmp.npz'
+        np.savez(tmp_file, **{run: np.asarray(labels) for run, labels in run_labels.items()})
+        os.replace(tmp_file, labels_file)
+
+    def load_sweep_labels(self, model_name):
+        """Load {run name: labels} saved by save_sweep_labels"""
+        labels_file = os.path.join(self.checkpoint_dir, f'{model_name}_labels.npz')
+        if os.path.exists(labels_file):
+            with np.load(labels_file) as data:
+                return {run: data[run] for run in data.files}
+        return None
+
+    def save_alignment_maps(self, model_name, maps):
+        """Save {method: {label: aligned_label}} maps next to the clustering results"""
+        alignment_file = os.path.join(self.checkpoint_dir, f'{model_name}_alignment.json')
+        atomic_write_json(alignment_file, {
+            method: {str(label): aligned for label, aligned in mapping.items()}
+            for method, mapping in maps.items()
+        })
+
+    def load_alignment_maps(self, model_name):
+        """Load saved label alignment maps"""
+        alignment_file = os.path.join(self.checkpoint_dir, f'{model_name}_alignment.json')
+        if os.path.exists(alignment_file):
+            with open(alignment_file, 'r') as f:
+                maps = json.load(f)
+            return {method: {int(label): aligned for label, aligned in mapping.items()}
+                    for method, mapping in maps.items()}
+        return None
@@ -1,17 +1,305 @@
-from sklearn.cluster import KMeans, DBSCAN
+from sklearn.cluster import KMeans, DBSCAN, MiniBatchKMeans, Birch, AgglomerativeClustering
+from sklearn.mixture import GaussianMixture
+from sklearn.neighbors import kneighbors_graph
+from sklearn.neighbors import NearestNeighbors
 import numpy as np
+import pickle
+import time
+
+STREAMING_METHODS = ('minibatch_kmeans', 'birch')
+
+# Display names used in reports and result file names
+METHOD_NAMES = {
+    'kmeans': 'KMeans',
+    'dbscan': 'DBSCAN',
+    'hierarchical': 'Hierarchical',
+    'gmm': 'GMM',
+    'minibatch_kmeans': 'MiniBatchKMeans',
+    'birch': 'BIRCH'
+}
+
+def iter_feature_chunks(source, chunk_size=10000):
+    """Yield float32 chunks from an in-memory/memmapped array or a FeatureStore"""
+    if hasattr(source, 'iter_chunks'):
+        yield from source.iter_chunks(chunk_size)
+        return
+    for start in range(0, len(source), chunk_size):
+        yield np.asarray(source[start:start + chunk_size], dtype=np.float32)
 
 class ImageClustering:
-    def __init__(self, method='kmeans', n_clusters=5):
+    def __init__(self, method='kmeans', n_clusters=5, batch_size=1024, birch_threshold=0.5,
+                 max_samples=20000, n_neighbors=10, eps=0.5, min_samples=5, ann_index=None,
+                 context=None, random_state=None, n_init=10, init='k-means++', init_centroids=None):
         self.method = method
         self.n_clusters = n_clusters
+        # Seeding and initialisation; init_centroids warm-starts KMeans-family
+        # fits and GMM means from a previous run's centroids
+        self.random_state = random_state
+        self.n_init = n_init
+        self.init = init
+        self.init_centroids = None if init_centroids is None else np.asarray(init_centroids, dtype=np.float64)
+        self.eps = eps
+        self.min_samples = min_samples
+        # Optional IVFIndex; DBSCAN then runs on its sparse radius-neighbours graph
+        self.ann_index = ann_index
+        # Optional EvaluationContext whose cached radius/kNN graphs are reused
+        self.context = context
+        self.batch_size = batch_size
+        self.birch_threshold = birch_threshold
+        # Hierarchical and GMM fits are capped at max_samples points; beyond that
+        # hierarchical switches to BIRCH pre-clustering and GMM fits on a subsample
+        self.max_samples = max_samples
+        self.n_neighbors = n_neighbors
+        self.fit_time_ = None
+        self.centroids_ = None
+        self.baseline_ = None
+        self._core_nn = None
+        # (features, labels, chunk_size) of the last fit, frozen lazily by freeze()
+        self._fit_state = None
         self.model = self._initialize_model()
-        
+
     def _initialize_model(self):
         if self.method == 'kmeans':
-            return KMeans(n_clusters=self.n_clusters)
+            return KMeans(n_clusters=self.n_clusters, **self._kmeans_init())
         elif self.method == 'dbscan':
-            return DBSCAN(eps=0.5, min_samples=5)
-            
+            return DBSCAN(eps=self.eps, min_samples=self.min_samples,
+                          metric='precomputed' if self._neighbors() is not None else 'euclidean')
+        elif self.method == 'minibatch_kmeans':
+            return MiniBatchKMeans(n_clusters=self.n_clusters, batch_size=self.batch_size,
+                                   **self._kmeans_init())
+        elif self.method == 'birch':
+            return Birch(n_clusters=self.n_clusters, threshold=self.birch_threshold)
+        elif self.method == 'hierarchical':
+            return AgglomerativeClustering(n_clusters=self.n_clusters, linkage='ward')
+        elif self.method == 'gmm':
+            return GaussianMixture(n_components=self.n_clusters, covariance_type='diag',
+                                   random_state=self.random_state)
+
+    def _kmeans_init(self):
+        """KMeans/MiniBatchKMeans init arguments; a warm start needs only one init"""
+        if self.init_centroids is not None:
+            if len(self.init_centroids) != self.n_clusters:
+                raise ValueError(f"init_centroids has {len(self.init_centroids)} rows, "
+                                 f"expected n_clusters={self.n_clusters}")
+            return {'init': self.init_centroids, 'n_init': 1, 'random_state': self.random_state}
+        return {'init': self.init, 'n_init': self.n_init, 'random_state': self.random_state}
+
+    def warm_start_centroids(self):
+        """Centroids to pass as init_centroids to the next run"""
+        for attr in ('cluster_centers_', 'means_'):
+            if hasattr(self.model, attr):
+                return np.asarray(getattr(self.model, attr))
+        if self.centroids_ is None and self._fit_state is not None:
+            self._freeze_centroids(*self._fit_state)
+        return self.centroids_
+
+    @property
+    def n_iter_(self):
+        return getattr(self.model, 'n_iter_', None)
+
     def fit_predict(self, features):
-        return self.model.fit_predict(features)
\ No newline at end of file
+        start = time.perf_counter()
+        if self.method == 'hierarchical':
+            labels = self._fit_predict_hierarchical(features)
+        elif self.method == 'gmm':
+            labels = self._fit_predict_gmm(features)
+        elif self.method == 'dbscan' and self._neighbors() is not None:
+            labels = self.model.fit_predict(self._neighbors().radius_neighbors_graph(self.eps))
+        else:
+            labels = self.model.fit_predict(features)
+        self.fit_time_ = time.perf_counter() - start
+        self._record_fit_state(features, labels)
+        return labels
+
+    def _neighbors(self):
+        return self.ann_index if self.ann_index is not None else self.context
+
+    def _sample(self, features):
+        if len(features) <= self.max_samples:
+            return np.asarray(features)
+        rng = np.random.default_rng(self.random_state)
+        return np.asarray(features[np.sort(rng.choice(len(features), self.max_samples, replace=False))])
+
+    def _fit_predict_hierarchical(self, features):
+        if len(features) <= self.max_samples:
+            # A sparse kNN connectivity graph keeps ward linkage from scanning all pairs
+            if self.context is not None:
+                connectivity = self.context.knn_graph(self.n_neighbors)
+            else:
+                connectivity = kneighbors_graph(features, self.n_neighbors, include_self=False)
+            self.model.set_params(connectivity=connectivity)
+            return self.model.fit_predict(features)
+
+        # BIRCH condenses the data into subclusters in one pass; ward linkage then
+        # merges only those subcluster centroids
+        self.model = Birch(n_clusters=AgglomerativeClustering(n_clusters=self.n_clusters, linkage='ward'),
+                           threshold=self.birch_threshold)
+        return self.model.fit_predict(features)
+
+    def _fit_predict_gmm(self, features):
+        sample = self._sample(features)
+        if self.init_centroids is not None:
+            centroids = self.init_centroids
+        else:
+            centroids = KMeans(n_clusters=self.n_clusters, n_init=1,
+                               random_state=self.random_state).fit(sample).cluster_centers_
+        self.model.set_params(means_init=centroids)
+        self.model.fit(sample)
+        return self.predict_stream(features, chunk_size=self.max_samples)
+
+    def partial_fit(self, chunk):
+        """Update a streaming model with one chunk of features"""
+        if self.method not in STREAMING_METHODS:
+            raise ValueError(f"partial_fit is only supported for {STREAMING_METHODS}")
+        self.model.partial_fit(chunk)
+        return self
+
+    def fit_stream(self, source, chunk_size=10000, n_epochs=1):
+        """Fit chunk-by-chunk from an array, memmap or FeatureStore with bounded memory"""
+        for _ in range(n_epochs):
+            for chunk in iter_feature_chunks(source, chunk_size):
+                self.partial_fit(chunk)
+        return self
+
+    def predict_stream(self, source, chunk_size=10000):
+        """Assign labels chunk-by-chunk after fit_stream"""
+        labels = [self.model.predict(chunk) for chunk in iter_feature_chunks(source, chunk_size)]
+        return np.concatenate(labels) if labels else np.empty(0, dtype=int)
+
+    def fit_predict_stream(self, source, chunk_size=10000, n_epochs=1):
+        labels = self.fit_stream(source, chunk_size, n_epochs).predict_stream(source, chunk_size)
+        self._record_fit_state(source, labels, chunk_size)
+        return labels
+
+    def _record_fit_state(self, features, labels, chunk_size=10000):
+        """Remember the fit so freeze() can build the assign() state on first use"""
+        self._fit_state = (features, np.asarray(labels), chunk_size)
+        self.centroids_ = None
+        self.baseline_ = None
+        self._core_nn = None
+
+    def freeze(self):
+        """Freeze what assign() needs: centroids, DBSCAN core points and baseline distances.
+
+        Runs one more pass over the training features (and a core-point search
+        for DBSCAN), so it is deferred from fit to the first assign()/save().
+        """
+        if self._fit_state is None:
+            if self.baseline_ is None:
+                raise ValueError("Model has not been fitted")
+            return self
+        features, labels, chunk_size = self._fit_state
+        if self.centroids_ is None:
+            self._freeze_centroids(features, labels, chunk_size)
+        if self.method == 'dbscan':
+            core = self.model.core_sample_indices_
+            self.core_points_ = np.asarray(features[core], dtype=np.float32)
+            self.core_labels_ = labels[core]
+
+        distances = np.concatenate([self._assign_chunk(chunk)[1]
+                                    for chunk in iter_feature_chunks(features, chunk_size)])
+        if self.method == 'dbscan' and len(self.core_points_) > 1:
+            # A core point's nearest core point is itself; use the nearest other one instead
+            core_distances, _ = self._core_nn.kneighbors(self.core_points_, n_neighbors=2)
+            distances[core] = core_distances[:, 1]
+        finite = distances[np.isfinite(distances)]
+        self.baseline_ = {
+            'mean_distance': float(finite.mean()) if len(finite) else 0.0,
+            'p95_distance': float(np.percentile(finite, 95)) if len(finite) else 0.0,
+            'noise_fraction': float(np.mean(labels == -1))
+        }
+        self._fit_state = None
+        return self
+
+    def _freeze_centroids(self, features, labels, chunk_size):
+        from .metrics import cluster_statistics
+
+        cluster_stats = cluster_statistics(features, labels, chunk_size)
+        unique = np.unique(labels)
+        keep = unique != -1
+        self.cluster_labels_ = unique[keep]
+        self.centroids_ = cluster_stats['centroids'][keep].astype(np.float32)
+        self.cluster_proportions_ = cluster_stats['counts'][keep] / len(labels)
+
+    def _assign_chunk(self, chunk):
+        """Return (labels, distance to nearest frozen reference point) for one chunk"""
+        if self.method == 'dbscan':
+            if len(self.core_points_) == 0:
+                return np.full(len(chunk), -1), np.full(len(chunk), np.inf)
+            if self._core_nn is None:
+                self._core_nn = NearestNeighbors(n_neighbors=1).fit(self.core_points_)
+            distances, nearest = self._core_nn.kneighbors(chunk)
+            distances, nearest = distances[:, 0], nearest[:, 0]
+            labels = np.where(distances <= self.eps, self.core_labels_[nearest], -1)
+            return labels, distances
+
+        d2 = (np.einsum('ij,ij->i', chunk, chunk)[:, None]
+              + np.einsum('ij,ij->i', self.centroids_, self.centroids_)[None, :]
+              - 2.0 * chunk @ self.centroids_.T)
+        distances = np.sqrt(np.maximum(d2, 0.0))
+        if hasattr(self.model, 'predict'):
+            labels = self.model.predict(chunk)
+            columns = np.minimum(np.searchsorted(self.cluster_labels_, labels),
+                                 len(self.cluster_labels_) - 1)
+            return labels, distances[np.arange(len(chunk)), columns]
+        # Agglomerative has no predict: fall back to the nearest cluster centroid
+        nearest = distances.argmin(axis=1)
+        return self.cluster_labels_[nearest], distances[np.arange(len(chunk)), nearest]
+
+    def assign(self, features, chunk_size=10000, return_drift=False,
+               max_outlier_fraction=0.10, max_proportion_shift=0.20):
+        """Label new embeddings against the frozen model without refitting.
+
+        With ``return_drift=True`` also returns drift statistics relative to the
+        training data and a ``refit_recommended`` flag.
+        """
+        self.freeze()
+        labels, distances = [], []
+        for chunk in iter_feature_chunks(features, chunk_size):
+            chunk_labels, chunk_distances = self._assign_chunk(chunk)
+            labels.append(chunk_labels)
+            distances.append(chunk_distances)
+        labels = np.concatenate(labels) if labels else np.empty(0, dtype=int)
+        if not return_drift:
+            return labels
+
+        distances = np.concatenate(distances) if distances else np.empty(0)
+        counts = np.array([np.sum(labels == label) for label in self.cluster_labels_])
+        proportions = counts / max(len(labels), 1)
+        finite = distances[np.isfinite(distances)]
+        mean_distance = float(finite.mean()) if len(finite) else float('inf')
+        outlier_fraction = float(np.mean(distances > self.baseline_['p95_distance'])) if len(distances) else 0.0
+        proportion_shift = float(0.5 * np.abs(proportions - self.cluster_proportions_).sum())
+        drift = {
+            'n_samples': len(labels),
+            'mean_distance': mean_distance,
+            'distance_ratio': mean_distance / self.baseline_['mean_distance']
+                              if self.baseline_['mean_distance'] else float('inf'),
+            'outlier_fraction': outlier_fraction,
+            'noise_fraction': float(np.mean(labels == -1)) if len(labels) else 0.0,
+            'proportion_shift': proportion_shift,
+            'refit_recommended': (outlier_fraction > max_outlier_fraction
+                                  or proportion_shift > max_proportion_shift)
+        }
+        return labels, drift
+
+    def __getstate__(self):
+        # A pickled model must be able to assign() without the training features
+        if self._fit_state is not None:
+            self.freeze()
+        state = self.__dict__.copy()
+        # Neighbour structures belong to the training feature set, not the frozen model
+        state['ann_index'] = None
+        state['context'] = None
+        state['_core_nn'] = None
+        return state
+
+    def save(self, path):
+        """Persist the fitted model for later assign() calls"""
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
@@ -1,11 +1,6 @@
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 class ComprehensiveEvaluator:
     def __init__(self, results_dir='results', analysis_dir='analysis'):
@@ -30,6 +25,9 @@ def evaluate_all_results(self):
         
     def _generate_model_comparison(self, df):
         """مقایسه عملکرد مدل‌های مختلف"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         # 1. نمودار مقایسه‌ای کلی
         fig = make_subplots(rows=3, cols=1,
                            subplot_titles=['Silhouette Score', 
@@ -84,6 +82,9 @@ def _generate_model_comparison(self, df):
 
     def _generate_clustering_analysis(self, df):
         """تحلیل روش‌های خوشه‌بندی"""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         clustering_methods = df['Clustering Method'].unique()
         
         # 1. مقایسه روش‌های خوشه‌بندی برای هر مدل
@@ -112,6 +113,9 @@ def _generate_clustering_analysis(self, df):
 
     def _generate_performance_metrics(self, df):
         """تولید معیارهای عملکرد تفصیلی"""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         metrics = ['Silhouette Score', 'Calinski-Harabasz Score', 'Davies-Bouldin Score']
         
         # 1. جدول خلاصه آماری
@@ -0,0 +1,78 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from PIL import Image
+
+_END = object()
+
+def load_rgb_image(img_path, target_size=None):
+    """Decode an image as RGB, optionally resized to (height, width) with nearest-neighbour"""
+    img = Image.open(img_path)
+    img = img.convert('RGB')
+    if target_size is not None:
+        height, width = target_size
+        if img.size != (width, height):
+            img = img.resize((width, height), Image.NEAREST)
+    return img
+
+class PrefetchLoader:
+    """Decode image batches on a worker pool ahead of the consumer.
+
+    At most ``queue_depth`` decoded batches are held in memory at once, so the
+    footprint stays bounded regardless of how many paths are fed in.
+    """
+
+    def __init__(self, load_fn, batch_size=32, num_workers=4, queue_depth=4, stack=True):
+        self.load_fn = load_fn
+        self.stack = stack
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers)
+        self.queue_depth = max(1, queue_depth)
+
+    def _produce(self, image_paths, out_queue, stop_event):
+        try:
+            with ThreadPoolExecutor(max_workers=self.num_workers) as pool:
+                for start in range(0, len(image_paths), self.batch_size):
+                    if stop_event.is_set():
+                        return
+                    batch_paths = image_paths[start:start + self.batch_size]
+                    batch = list(pool.map(self.load_fn, batch_paths))
+                    if self.stack:
+                        batch = np.stack(batch)
+                    while not stop_event.is_set():
+                        try:
+                            out_queue.put((batch_paths, batch), timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+        except Exception as e:
+            out_queue.put(e)
+        finally:
+            out_queue.put(_END)
+
+    def __call__(self, image_paths):
+        """Yield (paths, decoded batch) in input order"""
+        out_queue = queue.Queue(maxsize=self.queue_depth)
+        stop_event = threading.Event()
+        producer = threading.Thread(target=self._produce,
+                                    args=(image_paths, out_queue, stop_event),
+                                    daemon=True)
+        producer.start()
+        try:
+            while True:
+                item = out_queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop_event.set()
+            # Drain so a blocked producer can observe the stop flag and exit
+            while producer.is_alive():
+                try:
+                    out_queue.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            producer.join()
@@ -0,0 +1,150 @@
+import os
+import hashlib
+import numpy as np
+from scipy import sparse
+from sklearn.metrics import silhouette_score
+from .metrics import cluster_statistics, centroid_scores, silhouette_from_blocks
+
+class EvaluationContext:
+    """Distance structures for one feature set, shared by every clustering method and metric.
+
+    The full distance matrix (blockwise, float32, optionally memmapped under
+    ``cache_dir``), kNN lists, radius graphs and per-labelling centroid
+    statistics are each computed once; later consumers reuse them. Counters
+    record how many pairwise distance evaluations were performed and how many
+    were avoided by reuse.
+    """
+
+    def __init__(self, features, cache_dir=None, block_size=2000, max_dense=20000):
+        self.features = features
+        self.cache_dir = cache_dir
+        self.block_size = block_size
+        self.max_dense = max_dense
+        self.distance_evaluations = 0
+        self.distance_evaluations_saved = 0
+        self._norms = None
+        self._distances = None
+        self._knn = None
+        self._radius = None
+        self._cluster_stats = {}
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self.features)
+
+    def _block_distances(self, start, end):
+        if self._norms is None:
+            self._norms = np.einsum('ij,ij->i', self.features, self.features, dtype=np.float64
+                                    ).astype(np.float32)
+        block = np.asarray(self.features[start:end], dtype=np.float32)
+        d2 = self._norms[start:end, None] + self._norms[None, :] - 2.0 * block @ np.asarray(
+            self.features, dtype=np.float32).T
+        self.distance_evaluations += d2.size
+        # Float32 rounding leaves small non-zero self-distances; sklearn's precomputed check rejects them
+        rows = np.arange(end - start)
+        d2[rows, start + rows] = 0.0
+        return np.sqrt(np.maximum(d2, 0.0, out=d2), out=d2)
+
+    def _iter_blocks(self):
+        """Yield (start, distance rows) from the dense matrix if present, else computed on the fly"""
+        n = len(self)
+        for start in range(0, n, self.block_size):
+            end = min(start + self.block_size, n)
+            if self._distances is not None:
+                self.distance_evaluations_saved += (end - start) * n
+                yield start, np.asarray(self._distances[start:end])
+            else:
+                yield start, self._block_distances(start, end)
+
+    def distance_matrix(self):
+        """Full (N, N) float32 distance matrix, computed once"""
+        n = len(self)
+        if self._distances is not None:
+            self.distance_evaluations_saved += n * n
+            return self._distances
+        if self.cache_dir:
+            path = os.path.join(self.cache_dir, 'distances.npy')
+            self._distances = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(n, n))
+        else:
+            self._distances = np.empty((n, n), dtype=np.float32)
+        for start in range(0, n, self.block_size):
+            end = min(start + self.block_size, n)
+            self._distances[start:end] = self._block_distances(start, end)
+        return self._distances
+
+    def knn(self, k):
+        """(distances, indices) of each point's k nearest neighbours, excluding itself"""
+        if self._knn is not None and self._knn[0].shape[1] >= k:
+            self.distance_evaluations_saved += len(self) * len(self)
+            return self._knn[0][:, :k], self._knn[1][:, :k]
+        n = len(self)
+        distances = np.empty((n, k), dtype=np.float32)
+        indices = np.empty((n, k), dtype=np.int64)
+        for start, block in self._iter_blocks():
+            if self._distances is not None:
+                block = block.copy()
+            rows = np.arange(len(block))
+            block[rows, start + rows] = np.inf
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k]
+            order = np.argsort(block[rows[:, None], nearest], axis=1)
+            indices[start:start + len(block)] = nearest[rows[:, None], order]
+            distances[start:start + len(block)] = block[rows[:, None], indices[start:start + len(block)]]
+        self._knn = (distances, indices)
+        return distances, indices
+
+    def knn_graph(self, k):
+        """Sparse kNN connectivity graph, e.g. for ward agglomerative clustering"""
+        _, indices = self.knn(k)
+        n = len(self)
+        return sparse.csr_matrix((np.ones(indices.size), (np.repeat(np.arange(n), k), indices.ravel())),
+                                 shape=(n, n))
+
+    def radius_neighbors_graph(self, eps):
+        """Sparse distance graph of pairs within eps; reused for any smaller eps"""
+        n = len(self)
+        if self._radius is not None and self._radius[0] >= eps:
+            self.distance_evaluations_saved += n * n
+        else:
+            rows, cols, data = [], [], []
+            for start, block in self._iter_blocks():
+                r, c = np.nonzero(block <= eps)
+                rows.append(r + start)
+                cols.append(c)
+                data.append(block[r, c])
+            graph = sparse.csr_matrix((np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+                                      shape=(n, n))
+            self._radius = (eps, graph)
+            return graph
+
+        coo = self._radius[1].tocoo()
+        keep = coo.data <= eps
+        return sparse.csr_matrix((coo.data[keep], (coo.row[keep], coo.col[keep])),
+                                 shape=self._radius[1].shape)
+
+    def cluster_stats(self, labels):
+        """Per-cluster centroid statistics for a labelling, cached by label content"""
+        key = hashlib.sha1(np.ascontiguousarray(labels).tobytes()).hexdigest()
+        if key not in self._cluster_stats:
+            self._cluster_stats[key] = cluster_statistics(self.features, labels)
+        return self._cluster_stats[key]
+
+    def silhouette(self, labels):
+        """Silhouette from the shared distance matrix (dense up to max_dense points)"""
+        n = len(self)
+        if self._distances is None and n > self.max_dense:
+            # Too large to materialise densely: stream blocks through the same counters
+            return silhouette_from_blocks(self._iter_blocks(), labels)
+        return silhouette_score(self.distance_matrix(), labels, metric='precomputed')
+
+    def scores(self, labels):
+        """Silhouette, Calinski-Harabasz and Davies-Bouldin using only shared structures"""
+        scores = centroid_scores(self.features, labels, cluster_stats=self.cluster_stats(labels))
+        scores['silhouette'] = self.silhouette(labels)
+        return scores
+
+    def stats(self):
+        return {
+            'distance_evaluations': self.distance_evaluations,
+            'distance_evaluations_saved': self.distance_evaluations_saved
+        }
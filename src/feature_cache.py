@@ -0,0 +1,122 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import numpy as np
+
+class FeatureCache:
+    """Persistent per-image feature cache with size-bounded LRU eviction.
+
+    Entries are keyed by the image fingerprint together with the extractor
+    configuration (model name, pooling, input size, ...), so changing either
+    the file or the backbone produces a miss. Vectors are stored as individual
+    ``.npy`` files and a small SQLite index tracks sizes and access times.
+    """
+
+    def __init__(self, cache_dir='feature_cache', max_bytes=10 * 1024 ** 3, fingerprint='stat'):
+        if fingerprint not in ('stat', 'content'):
+            raise ValueError("fingerprint must be 'stat' or 'content'")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(cache_dir, exist_ok=True)
+        self._db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'))
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'key TEXT PRIMARY KEY, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+        )
+        self._db.commit()
+
+    def _file_fingerprint(self, img_path):
+        if self.fingerprint == 'content':
+            digest = hashlib.sha1()
+            with open(img_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            return digest.hexdigest()
+        stat = os.stat(img_path)
+        return f"{os.path.abspath(img_path)}:{stat.st_mtime_ns}:{stat.st_size}"
+
+    def make_key(self, img_path, config):
+        """Build the cache key for an image under a given extractor config"""
+        payload = json.dumps(config, sort_keys=True) + '|' + self._file_fingerprint(img_path)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.npy')
+
+    def get_many(self, keys):
+        """Return {key: vector} for the keys present in the cache"""
+        found = {}
+        now = time.time()
+        for key in keys:
+            entry_path = self._entry_path(key)
+            try:
+                found[key] = np.load(entry_path)
+            except (FileNotFoundError, ValueError, OSError):
+                self.misses += 1
+                continue
+            self.hits += 1
+        if found:
+            self._db.executemany('UPDATE entries SET last_access = ? WHERE key = ?',
+                                 [(now, key) for key in found])
+            self._db.commit()
+        return found
+
+    def put_many(self, items):
+        """Store an iterable of (key, vector) pairs and evict if over budget"""
+        now = time.time()
+        rows = []
+        for key, vector in items:
+            entry_path = self._entry_path(key)
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            tmp_path = entry_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.save(f, np.asarray(vector, dtype=np.float32))
+            os.replace(tmp_path, entry_path)
+            rows.append((key, os.path.getsize(entry_path), now))
+        self._db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', rows)
+        self._db.commit()
+        self._evict()
+
+    def _evict(self):
+        total = self.size_bytes()
+        if total <= self.max_bytes:
+            return
+        entries = self._db.execute(
+            'SELECT key, size FROM entries ORDER BY last_access ASC').fetchall()
+        removed = []
+        for key, size in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+            removed.append((key,))
+            total -= size
+        self._db.executemany('DELETE FROM entries WHERE key = ?', removed)
+        self._db.commit()
+        self.evictions += len(removed)
+
+    def size_bytes(self):
+        """Total size of cached vectors on disk"""
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+
+    def stats(self):
+        """Hit/miss counters for the current session"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size_bytes': self.size_bytes()
+        }
+
+    def close(self):
+        self._db.close()
@@ -1,24 +1,250 @@
-import tensorflow as tf
-from tensorflow.keras.applications import VGG16, ResNet50, InceptionV3
-from tensorflow.keras.preprocessing import image
+import os
 import numpy as np
+from PIL import Image
+from .data_pipeline import PrefetchLoader, load_rgb_image
+from .preprocessing import get_preprocessing, preprocess_batch, preprocess_tensor
+
+POOLING_METHODS = ('flatten', 'avg', 'max', 'gem')
+
+INFERENCE_MODES = ('eager', 'function', 'xla', 'savedmodel')
+
+def pool_features(conv_maps, pooling='flatten', gem_p=3.0):
+    """Reduce a (N, H, W, C) batch of conv maps to (N, D) embeddings"""
+    conv_maps = np.asarray(conv_maps, dtype=np.float32)
+    if pooling == 'flatten':
+        return conv_maps.reshape(len(conv_maps), -1)
+    if pooling == 'avg':
+        return conv_maps.mean(axis=(1, 2))
+    if pooling == 'max':
+        return conv_maps.max(axis=(1, 2))
+    if pooling == 'gem':
+        clipped = np.maximum(conv_maps, 1e-6)
+        return np.power(np.power(clipped, gem_p).mean(axis=(1, 2)), 1.0 / gem_p)
+    raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING_METHODS}")
 
 class FeatureExtractor:
-    def __init__(self, model_name='vgg16'):
+    def __init__(self, model_name='vgg16', batch_size=32, num_workers=4, queue_depth=4,
+                 pooling='flatten', gem_p=3.0, cache=None, fuse_preprocessing=False,
+                 inference_mode='eager', export_dir='exported_models', quantization=None,
+                 calibration_paths=None, num_threads=None):
+        if pooling not in POOLING_METHODS:
+            raise ValueError(f"Unknown pooling '{pooling}', expected one of {POOLING_METHODS}")
+        if inference_mode not in INFERENCE_MODES:
+            raise ValueError(f"Unknown inference_mode '{inference_mode}', expected one of {INFERENCE_MODES}")
         self.model_name = model_name
-        self.model = self._load_model()
-        
+        self.pooling = pooling
+        self.gem_p = gem_p
+        self.cache = cache
+        self.preprocessing = get_preprocessing(model_name)
+        self.input_size = self.preprocessing['input_size']
+        self.fuse_preprocessing = fuse_preprocessing
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.queue_depth = queue_depth
+        self.inference_mode = inference_mode
+        self.export_dir = export_dir
+        self.quantization = quantization
+        self.calibration_paths = calibration_paths
+        self.num_threads = num_threads
+        self._model = None
+        self._inference_fn = None
+
+    @property
+    def model(self):
+        """Backbone, built on first use so importing and constructing stay cheap"""
+        if self._model is None:
+            self._model = self._load_model()
+        return self._model
+
     def _load_model(self):
+        import tensorflow as tf
+        from tensorflow.keras.applications import VGG16, ResNet50, InceptionV3
+
         if self.model_name == 'vgg16':
-            return VGG16(weights='imagenet', include_top=False)
+            backbone = VGG16(weights='imagenet', include_top=False)
         elif self.model_name == 'resnet50':
-            return ResNet50(weights='imagenet', include_top=False)
+            backbone = ResNet50(weights='imagenet', include_top=False)
         elif self.model_name == 'inception':
-            return InceptionV3(weights='imagenet', include_top=False)
-            
+            backbone = InceptionV3(weights='imagenet', include_top=False)
+        if not self.fuse_preprocessing:
+            return backbone
+
+        # Run preprocessing as the first op of the graph instead of in NumPy
+        inputs = tf.keras.Input(shape=(*self.input_size, 3))
+        x = tf.keras.layers.Lambda(lambda t: preprocess_tensor(t, self.model_name))(inputs)
+        return tf.keras.Model(inputs, backbone(x, training=False), name=f'{self.model_name}_fused')
+
+    def cache_config(self):
+        """Settings that change the produced features, used to key the feature cache"""
+        return {
+            'model': self.model_name,
+            'target_size': list(self.input_size),
+            'preprocessing': self.preprocessing,
+            'quantization': self.quantization,
+            'pooling': self.pooling,
+            'gem_p': self.gem_p if self.pooling == 'gem' else None
+        }
+
+    def _load_image(self, img_path):
+        """Decode and resize a single image into a float32 array"""
+        return np.asarray(load_rgb_image(img_path, self.input_size), dtype=np.float32)
+
+    def _resize_batch(self, images):
+        """Resize already-decoded PIL images to this backbone's input size and stack them"""
+        height, width = self.input_size
+        return np.stack([
+            np.asarray(img if img.size == (width, height)
+                       else img.resize((width, height), Image.NEAREST), dtype=np.float32)
+            for img in images
+        ])
+
+    def _prepare(self, batch):
+        """Apply model-specific preprocessing to a whole batch unless it is fused into the graph"""
+        if self.fuse_preprocessing:
+            return np.asarray(batch, dtype=np.float32)
+        return preprocess_batch(batch, self.model_name)
+
+    def export_path(self):
+        """Location of the exported SavedModel for this backbone"""
+        suffix = '_fused' if self.fuse_preprocessing else ''
+        return os.path.join(self.export_dir, f'{self.model_name}{suffix}')
+
+    def _calibration_batches(self):
+        """Preprocessed batches from calibration_paths for INT8 range estimation"""
+        loader = PrefetchLoader(self._load_image, batch_size=self.batch_size,
+                                num_workers=self.num_workers, queue_depth=self.queue_depth)
+        for _, batch in loader(self.calibration_paths):
+            yield self._prepare(batch)
+
+    def _build_inference_fn(self):
+        """Return a callable mapping a float32 batch to conv maps for the chosen mode"""
+        if self.quantization is not None:
+            from .quantization import load_or_convert
+
+            model_path = f'{self.export_path()}_{self.quantization}.tflite'
+            representative = self._calibration_batches() if self.calibration_paths else None
+            return load_or_convert(lambda: self.model, model_path, self.input_size,
+                                   self.quantization, representative, self.num_threads)
+
+        if self.inference_mode == 'eager':
+            return lambda batch: self.model(batch, training=False)
+
+        import tensorflow as tf
+
+        # A fixed signature lets the graph be traced once and reused for every batch
+        signature = [tf.TensorSpec([None, *self.input_size, 3], tf.float32)]
+        if self.inference_mode == 'savedmodel':
+            path = self.export_path()
+            if not os.path.exists(os.path.join(path, 'saved_model.pb')):
+                module = tf.Module()
+                module.serve = tf.function(lambda x: self.model(x, training=False),
+                                           input_signature=signature)
+                tf.saved_model.save(module, path)
+            return tf.saved_model.load(path).serve
+
+        return tf.function(lambda x: self.model(x, training=False),
+                           input_signature=signature,
+                           jit_compile=self.inference_mode == 'xla')
+
+    def _forward(self, batch):
+        """Run the backbone once on a stacked batch and return raw conv maps"""
+        if self._inference_fn is None:
+            self._inference_fn = self._build_inference_fn()
+        return self._inference_fn(self._prepare(batch))
+
+    def _predict(self, batch):
+        return pool_features(self._forward(batch), self.pooling, self.gem_p)
+
     def extract_features(self, img_path):
-        img = image.load_img(img_path, target_size=(224, 224))
-        x = image.img_to_array(img)
-        x = np.expand_dims(x, axis=0)
-        features = self.model.predict(x)
-        return features.flatten()
\ No newline at end of file
+        x = np.expand_dims(self._load_image(img_path), axis=0)
+        return self._predict(x)[0]
+
+    def iter_batches(self, image_paths, batch_size=None):
+        """Yield (paths, features) for consecutive fixed-size batches"""
+        loader = PrefetchLoader(self._load_image,
+                                batch_size=batch_size or self.batch_size,
+                                num_workers=self.num_workers,
+                                queue_depth=self.queue_depth)
+        for batch_paths, batch in loader(image_paths):
+            yield batch_paths, self._predict(batch)
+
+    def extract_batch(self, image_paths, batch_size=None):
+        """Extract features for many images as a contiguous (N, D) float32 matrix"""
+        if self.cache is None:
+            chunks = [features for _, features in self.iter_batches(image_paths, batch_size)]
+            if not chunks:
+                return np.empty((0, 0), dtype=np.float32)
+            return np.ascontiguousarray(np.concatenate(chunks, axis=0), dtype=np.float32)
+
+        # Only run inference on images whose features are not cached yet
+        config = self.cache_config()
+        keys = [self.cache.make_key(p, config) for p in image_paths]
+        cached = self.cache.get_many(keys)
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+
+        offset = 0
+        for _, features in self.iter_batches([image_paths[i] for i in missing], batch_size):
+            batch_keys = [keys[i] for i in missing[offset:offset + len(features)]]
+            self.cache.put_many(zip(batch_keys, features))
+            cached.update(zip(batch_keys, features))
+            offset += len(features)
+
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.stack([cached[key] for key in keys]), dtype=np.float32)
+
+
+class MultiFeatureExtractor:
+    """Run several backbones over a single image decode pass.
+
+    Each image is read and decoded once at its native resolution, then resized
+    to every backbone's own input size, so disk I/O and decoding are shared.
+    """
+
+    def __init__(self, model_names=('vgg16', 'resnet50', 'inception'), batch_size=32,
+                 num_workers=4, queue_depth=4, pooling='flatten', gem_p=3.0,
+                 fuse_preprocessing=False, inference_mode='eager', export_dir='exported_models',
+                 quantization=None, calibration_paths=None):
+        self.model_names = list(model_names)
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.queue_depth = queue_depth
+        self.extractors = {
+            name: FeatureExtractor(name, batch_size=batch_size, pooling=pooling, gem_p=gem_p,
+                                   fuse_preprocessing=fuse_preprocessing,
+                                   inference_mode=inference_mode, export_dir=export_dir,
+                                   quantization=(quantization.get(name)
+                                                 if isinstance(quantization, dict) else quantization),
+                                   calibration_paths=calibration_paths)
+            for name in self.model_names
+        }
+
+    def _decode_image(self, img_path):
+        return load_rgb_image(img_path)
+
+    def iter_batches(self, image_paths, batch_size=None, model_names=None):
+        """Yield (paths, {model_name: features}) for consecutive batches"""
+        model_names = model_names or self.model_names
+        loader = PrefetchLoader(self._decode_image,
+                                batch_size=batch_size or self.batch_size,
+                                num_workers=self.num_workers,
+                                queue_depth=self.queue_depth,
+                                stack=False)
+        for batch_paths, images in loader(image_paths):
+            yield batch_paths, {
+                name: self.extractors[name]._predict(self.extractors[name]._resize_batch(images))
+                for name in model_names
+            }
+
+    def extract_batch(self, image_paths, batch_size=None, model_names=None):
+        """Extract {model_name: (N, D) float32 matrix} for many images"""
+        model_names = model_names or self.model_names
+        chunks = {name: [] for name in model_names}
+        for _, features in self.iter_batches(image_paths, batch_size, model_names):
+            for name in model_names:
+                chunks[name].append(features[name])
+        return {
+            name: (np.ascontiguousarray(np.concatenate(parts, axis=0), dtype=np.float32)
+                   if parts else np.empty((0, 0), dtype=np.float32))
+            for name, parts in chunks.items()
+        }
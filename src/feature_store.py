@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+
+def atomic_write_json(path, data):
+    """Write JSON via a temp file and rename so readers never see a partial file"""
+    # A unique temp file per writer, so concurrent threads never share one
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+class FeatureStore:
+    """Append-only feature store made of ``.npy`` shards plus a JSON index.
+
+    Each shard is written to a temp file and renamed into place, and the index
+    is only updated after the shard is on disk, so a crash mid-write leaves the
+    store at its last consistent state. Shards are opened with
+    ``np.load(mmap_mode='r')`` so reading does not copy features into RAM.
+    """
+
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, root, dtype='float32'):
+        if np.dtype(dtype) not in (np.dtype('float32'), np.dtype('float16')):
+            raise ValueError("dtype must be float32 or float16")
+        self.root = root
+        self.dtype = np.dtype(dtype)
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, self.INDEX_FILE)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            self.dtype = np.dtype(index['dtype'])
+            return index
+        return {'dtype': self.dtype.name, 'n_features': None, 'shards': []}
+
+    def _shard_path(self, name):
+        return os.path.join(self.root, name)
+
+    def __len__(self):
+        return sum(shard['count'] for shard in self.index['shards'])
+
+    @property
+    def n_features(self):
+        return self.index['n_features']
+
+    def append(self, features, image_paths, shard_id=None):
+        """Write one shard of features and record it in the index"""
+        features = np.asarray(features, dtype=self.dtype)
+        if features.ndim != 2 or len(features) != len(image_paths):
+            raise ValueError("features must be (N, D) with one row per image path")
+        if self.index['n_features'] not in (None, features.shape[1]):
+            raise ValueError(f"Expected {self.index['n_features']} features, got {features.shape[1]}")
+
+        if shard_id is None:
+            shard_id = len(self.index['shards'])
+        name = f'shard_{shard_id:05d}'
+        tmp_path = self._shard_path(f'{name}.tmp.npy')
+        np.save(tmp_path, features)
+        os.replace(tmp_path, self._shard_path(f'{name}.npy'))
+        atomic_write_json(self._shard_path(f'{name}.paths.json'), list(map(str, image_paths)))
+
+        self.index['n_features'] = features.shape[1]
+        self.index.pop('consolidated', None)
+        self.index['shards'] = [s for s in self.index['shards'] if s['name'] != name]
+        self.index['shards'].append({'name': name, 'count': len(features)})
+        self.index['shards'].sort(key=lambda s: s['name'])
+        atomic_write_json(self.index_path, self.index)
+        return name
+
+    def clear(self):
+        """Remove all shards and reset the index"""
+        for name in os.listdir(self.root):
+            if name.startswith(('shard_', 'features')) and name.endswith(('.npy', '.json')):
+                os.remove(self._shard_path(name))
+        self.index = {'dtype': self.dtype.name, 'n_features': None, 'shards': []}
+        atomic_write_json(self.index_path, self.index)
+
+    def fingerprint(self):
+        """Hash of the shard layout and file stamps, used to key derived artifacts"""
+        digest = hashlib.sha1(json.dumps([self.index['dtype'], self.index['n_features']]).encode())
+        for shard in self.index['shards']:
+            stat = os.stat(self._shard_path(f"{shard['name']}.npy"))
+            digest.update(f"{shard['name']}:{shard['count']}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+        return digest.hexdigest()
+
+    def has_shard(self, shard_id):
+        name = f'shard_{shard_id:05d}'
+        return any(s['name'] == name for s in self.index['shards'])
+
+    def remove_shard(self, shard_id):
+        """Drop one shard from the index and delete its files"""
+        name = f'shard_{shard_id:05d}'
+        self.index['shards'] = [s for s in self.index['shards'] if s['name'] != name]
+        self.index.pop('consolidated', None)
+        atomic_write_json(self.index_path, self.index)
+        for suffix in ('.npy', '.paths.json'):
+            if os.path.exists(self._shard_path(name + suffix)):
+                os.remove(self._shard_path(name + suffix))
+
+    def iter_shards(self):
+        """Yield (features memmap, image paths) per shard in order"""
+        for shard in self.index['shards']:
+            features = np.load(self._shard_path(f"{shard['name']}.npy"), mmap_mode='r')
+            with open(self._shard_path(f"{shard['name']}.paths.json"), 'r') as f:
+                paths = json.load(f)
+            yield features, paths
+
+    def iter_chunks(self, chunk_size=10000):
+        """Yield float32 feature chunks of at most chunk_size rows, reading shards lazily"""
+        for features, _ in self.iter_shards():
+            for start in range(0, len(features), chunk_size):
+                yield np.asarray(features[start:start + chunk_size], dtype=np.float32)
+
+    def image_paths(self):
+        paths = []
+        for shard in self.index['shards']:
+            with open(self._shard_path(f"{shard['name']}.paths.json"), 'r') as f:
+                paths.extend(json.load(f))
+        return paths
+
+    def consolidate(self):
+        """Merge shards into a single ``features.npy`` so it can be memmapped as one array"""
+        out_path = self._shard_path('features.npy')
+        total = len(self)
+        if self.index.get('consolidated') == total and os.path.exists(out_path):
+            return out_path
+        tmp_path = self._shard_path('features.tmp.npy')
+        merged = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype,
+                                           shape=(total, self.index['n_features'] or 0))
+        offset = 0
+        for features, _ in self.iter_shards():
+            merged[offset:offset + len(features)] = features
+            offset += len(features)
+        merged.flush()
+        del merged
+        os.replace(tmp_path, out_path)
+        self.index['consolidated'] = total
+        atomic_write_json(self.index_path, self.index)
+        return out_path
+
+    def load(self, mmap=True):
+        """Return (features, image_paths); features are a read-only memmap by default"""
+        if not self.index['shards']:
+            return None, None
+        if len(self.index['shards']) == 1:
+            name = self.index['shards'][0]['name']
+            features_path = self._shard_path(f'{name}.npy')
+        else:
+            features_path = self.consolidate()
+        features = np.load(features_path, mmap_mode='r' if mmap else None)
+        return features, self.image_paths()
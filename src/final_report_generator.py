@@ -1,9 +1,5 @@
 import os
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import seaborn as sns
-import matplotlib.pyplot as plt
 
 class FinalReportGenerator:
     def __init__(self, results_dir='results', report_dir='final_report'):
@@ -59,6 +55,8 @@ def _generate_executive_summary(self, df):
         
     def _generate_model_comparison(self, df):
         """تولید مقایسه جامع مدل‌ها"""
+        import plotly.graph_objects as go
+
         # 1. نمودار رادار برای مقایسه چند بعدی
         metrics = ['Silhouette Score', 'Calinski-Harabasz Score', 'Davies-Bouldin Score']
         model_scores = df.groupby('Model')[metrics].mean()
@@ -84,6 +82,9 @@ def _generate_model_comparison(self, df):
         
     def _generate_clustering_analysis(self, df):
         """تحلیل روش‌های خوشه‌بندی"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         # 1. مقایسه روش‌های خوشه‌بندی
         clustering_comparison = df.groupby('Clustering Method')[
             ['Silhouette Score', 'Calinski-Harabasz Score', 'Davies-Bouldin Score']
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+def contingency_matrix(labels_a, labels_b):
+    """Vectorized contingency table; returns (table, classes_a, classes_b)"""
+    classes_a, codes_a = np.unique(labels_a, return_inverse=True)
+    classes_b, codes_b = np.unique(labels_b, return_inverse=True)
+    table = np.bincount(codes_a * len(classes_b) + codes_b,
+                        minlength=len(classes_a) * len(classes_b))
+    return table.reshape(len(classes_a), len(classes_b)), classes_a, classes_b
+
+def alignment_map(reference, labels):
+    """Map each label in ``labels`` to the reference cluster it overlaps most (Hungarian).
+
+    Noise (-1) stays -1; clusters left unmatched because ``labels`` has more
+    clusters than the reference get fresh ids after the largest reference id.
+    """
+    reference, labels = np.asarray(reference), np.asarray(labels)
+    table, ref_classes, classes = contingency_matrix(reference, labels)
+    ref_keep, keep = ref_classes != -1, classes != -1
+    rows, cols = linear_sum_assignment(-table[np.ix_(ref_keep, keep)])
+
+    mapping = {-1: -1} if (~keep).any() else {}
+    matched_ref, matched = ref_classes[ref_keep][rows], classes[keep][cols]
+    mapping.update({int(l): int(r) for l, r in zip(matched, matched_ref)})
+    next_id = int(ref_classes.max()) + 1 if len(ref_classes) else 0
+    for label in classes[keep]:
+        if int(label) not in mapping:
+            mapping[int(label)] = next_id
+            next_id += 1
+    return mapping
+
+def apply_mapping(labels, mapping):
+    labels = np.asarray(labels)
+    classes, codes = np.unique(labels, return_inverse=True)
+    return np.array([mapping[int(c)] for c in classes])[codes]
+
+def align_labels(reference, labels):
+    """Return (labels relabelled to match reference, mapping)"""
+    mapping = alignment_map(reference, labels)
+    return apply_mapping(labels, mapping), mapping
+
+def align_results(clustering_results, reference=None):
+    """Align every ``{method: labels}`` entry to a reference labelling.
+
+    ``reference`` may be a method name in ``clustering_results``, a label
+    array (e.g. a previous run's labels), or None for the first method.
+    Returns ``(aligned_results, {method: mapping})``.
+    """
+    if reference is None:
+        reference = next(iter(clustering_results))
+    if isinstance(reference, str):
+        reference = clustering_results[reference]
+    aligned, maps = {}, {}
+    for method, labels in clustering_results.items():
+        aligned[method], maps[method] = align_labels(reference, labels)
+    return aligned, maps
+
+def _comb2(x):
+    x = np.asarray(x, dtype=np.float64)
+    return x * (x - 1) / 2
+
+def _entropy(counts, n):
+    p = counts[counts > 0] / n
+    return float(-(p * np.log(p)).sum())
+
+def scores_from_contingency(table):
+    """Adjusted Rand index and (arithmetic) normalized mutual information"""
+    n = table.sum()
+    rows, cols = table.sum(axis=1), table.sum(axis=0)
+    sum_cells, sum_rows, sum_cols = _comb2(table).sum(), _comb2(rows).sum(), _comb2(cols).sum()
+    expected = sum_rows * sum_cols / _comb2(n)
+    maximum = (sum_rows + sum_cols) / 2
+    ari = 1.0 if maximum == expected else float((sum_cells - expected) / (maximum - expected))
+
+    nz = table > 0
+    outer = np.outer(rows, cols)
+    mi = float((table[nz] / n * np.log(table[nz] * n / outer[nz])).sum())
+    h_rows, h_cols = _entropy(rows, n), _entropy(cols, n)
+    denominator = (h_rows + h_cols) / 2
+    nmi = 1.0 if denominator == 0 else mi / denominator
+    return ari, nmi
+
+def agreement_matrix(runs):
+    """Pairwise ARI and NMI between labellings ``{run_name: labels}`` as two DataFrames"""
+    names = list(runs)
+    # Encode once so each pair costs a single bincount
+    encoded = {}
+    for name in names:
+        classes, codes = np.unique(runs[name], return_inverse=True)
+        encoded[name] = (codes, len(classes))
+    ari = np.eye(len(names))
+    nmi = np.eye(len(names))
+    for i, a in enumerate(names):
+        codes_a, k_a = encoded[a]
+        for j in range(i + 1, len(names)):
+            codes_b, k_b = encoded[names[j]]
+            table = np.bincount(codes_a * k_b + codes_b, minlength=k_a * k_b).reshape(k_a, k_b)
+            ari[i, j], nmi[i, j] = scores_from_contingency(table)
+            ari[j, i], nmi[j, i] = ari[i, j], nmi[i, j]
+    return (pd.DataFrame(ari, index=names, columns=names),
+            pd.DataFrame(nmi, index=names, columns=names))
@@ -0,0 +1,185 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+# One fixed-size record per image; the relative path lives in a separate byte
+# blob addressed by (path_offset, path_length), so paths are only decoded to
+# Python strings a batch at a time
+RECORD_DTYPE = np.dtype([
+    ('path_offset', np.int64),
+    ('path_length', np.int32),
+    ('size', np.int64),
+    ('mtime_ns', np.int64),
+    ('width', np.int32),
+    ('height', np.int32)
+])
+
+def scan_images(directory, extensions=IMAGE_EXTENSIONS):
+    """Recursively yield os.DirEntry objects for image files, using os.scandir"""
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                subdirs = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    elif entry.name.lower().endswith(extensions):
+                        yield entry
+                stack.extend(sorted(subdirs, reverse=True))
+        except PermissionError:
+            continue
+
+def _image_dimensions(path):
+    """Read (width, height) from the image header without decoding pixels"""
+    from PIL import Image
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except OSError:
+        return -1, -1
+
+class ImageManifest:
+    """Read side of an on-disk manifest: records memmap plus a path byte blob"""
+
+    def __init__(self, manifest_dir):
+        self.manifest_dir = manifest_dir
+        with open(os.path.join(manifest_dir, 'manifest.json'), 'r') as f:
+            self.meta = json.load(f)
+        self.root = self.meta['root']
+        count = self.meta['count']
+        self.records = (np.memmap(os.path.join(manifest_dir, 'records.bin'), dtype=RECORD_DTYPE,
+                                  mode='r', shape=(count,))
+                        if count else np.empty(0, dtype=RECORD_DTYPE))
+        self._paths = (np.memmap(os.path.join(manifest_dir, 'paths.bin'), dtype=np.uint8, mode='r')
+                       if count else np.empty(0, dtype=np.uint8))
+
+    def __len__(self):
+        return len(self.records)
+
+    def _decode(self, records):
+        return [os.path.join(self.root, bytes(self._paths[o:o + n]).decode('utf-8'))
+                for o, n in zip(records['path_offset'], records['path_length'])]
+
+    def __getitem__(self, item):
+        """Path string for an int, list of path strings for a slice"""
+        if isinstance(item, slice):
+            return self._decode(self.records[item])
+        index = item + len(self) if item < 0 else item
+        if not 0 <= index < len(self):
+            raise IndexError(f"manifest index {item} out of range for {len(self)} images")
+        return self._decode(self.records[index:index + 1])[0]
+
+    def iter_paths(self, batch_size=10000):
+        """Yield lists of at most batch_size absolute paths"""
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+    def fingerprint(self):
+        """Hash of every record (paths, sizes, mtimes) computed chunk-wise"""
+        digest = hashlib.sha1()
+        for start in range(0, len(self), 100000):
+            digest.update(np.ascontiguousarray(self.records[start:start + 100000]).tobytes())
+        digest.update(np.asarray(self._paths).tobytes())
+        return digest.hexdigest()
+
+def build_manifest(image_dir, manifest_dir='manifest', extensions=IMAGE_EXTENSIONS,
+                   read_dimensions=True, batch_size=10000):
+    """Scan image_dir into an on-disk manifest, incrementally if one already exists.
+
+    Directories whose mtime is unchanged since the previous scan reuse their
+    old records: their files are not stat'ed and their headers are not re-read.
+    Records are flushed to disk every ``batch_size`` images, so memory stays flat
+    for trees of millions of files.
+    """
+    os.makedirs(manifest_dir, exist_ok=True)
+    image_dir = os.path.abspath(image_dir)
+    previous = None
+    if os.path.exists(os.path.join(manifest_dir, 'manifest.json')):
+        previous = ImageManifest(manifest_dir)
+        if previous.root != image_dir:
+            previous = None
+    previous_dirs = previous.meta['directories'] if previous is not None else {}
+
+    records_tmp = os.path.join(manifest_dir, 'records.bin.tmp')
+    paths_tmp = os.path.join(manifest_dir, 'paths.bin.tmp')
+    directories = {}
+    count, path_bytes, reused = 0, 0, 0
+
+    with open(records_tmp, 'wb') as records_out, open(paths_tmp, 'wb') as paths_out:
+        buffer = []
+
+        def flush():
+            if buffer:
+                records_out.write(np.array(buffer, dtype=RECORD_DTYPE).tobytes())
+                buffer.clear()
+
+        stack = [image_dir]
+        while stack:
+            current = stack.pop()
+            rel_dir = os.path.relpath(current, image_dir)
+            try:
+                dir_mtime = os.stat(current).st_mtime_ns
+            except PermissionError:
+                continue
+
+            first = count
+            old = previous_dirs.get(rel_dir)
+            reuse = old is not None and old['mtime_ns'] == dir_mtime
+            if reuse:
+                # Unchanged directory: copy its records and paths without touching the files
+                # (a directory's paths are contiguous in the blob, so copy them as one slice)
+                flush()
+                old_records = np.array(previous.records[old['first']:old['first'] + old['count']])
+                if len(old_records):
+                    start = int(old_records['path_offset'][0])
+                    end = int(old_records['path_offset'][-1] + old_records['path_length'][-1])
+                    paths_out.write(np.asarray(previous._paths[start:end]).tobytes())
+                    old_records['path_offset'] += path_bytes - start
+                    records_out.write(old_records.tobytes())
+                    path_bytes += end - start
+                count += len(old_records)
+                reused += len(old_records)
+
+            # Stream the listing: files are recorded in scandir order as they are seen, so
+            # even a flat directory of 100k+ images never holds all its entries at once.
+            # Unchanged directories are still listed (without stat) to find subdirectories
+            subdirs = []
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                            continue
+                        if reuse or not entry.name.lower().endswith(extensions):
+                            continue
+                        stat = entry.stat()
+                        width, height = _image_dimensions(entry.path) if read_dimensions else (-1, -1)
+                        blob = os.path.relpath(entry.path, image_dir).encode('utf-8')
+                        paths_out.write(blob)
+                        buffer.append((path_bytes, len(blob), stat.st_size, stat.st_mtime_ns,
+                                       width, height))
+                        path_bytes += len(blob)
+                        count += 1
+                        if len(buffer) >= batch_size:
+                            flush()
+            except PermissionError:
+                pass
+            stack.extend(sorted(subdirs, reverse=True))
+            directories[rel_dir] = {'mtime_ns': dir_mtime, 'first': first, 'count': count - first}
+        flush()
+
+    # Drop the old memmaps before replacing the files they map
+    previous = None
+    os.replace(records_tmp, os.path.join(manifest_dir, 'records.bin'))
+    os.replace(paths_tmp, os.path.join(manifest_dir, 'paths.bin'))
+    meta = {'root': image_dir, 'count': count, 'reused': reused, 'directories': directories}
+    tmp_meta = os.path.join(manifest_dir, 'manifest.json.tmp')
+    with open(tmp_meta, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp_meta, os.path.join(manifest_dir, 'manifest.json'))
+    return ImageManifest(manifest_dir)
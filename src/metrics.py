@@ -0,0 +1,140 @@
+import numpy as np
+from scipy import sparse, stats
+from sklearn.metrics import silhouette_score
+from .clustering import iter_feature_chunks
+
+def _encode_labels(labels):
+    """Map arbitrary labels to 0..k-1 and return (codes, counts)"""
+    _, codes = np.unique(labels, return_inverse=True)
+    return codes, np.bincount(codes)
+
+def cluster_statistics(features, labels, chunk_size=10000):
+    """Per-cluster counts, centroids and within-cluster sum of squares in one chunked pass"""
+    codes, counts = _encode_labels(labels)
+    k = len(counts)
+    sums = None
+    sq_norms = np.zeros(k, dtype=np.float64)
+    offset = 0
+    for chunk in iter_feature_chunks(features, chunk_size):
+        if sums is None:
+            sums = np.zeros((k, chunk.shape[1]), dtype=np.float64)
+        chunk_codes = codes[offset:offset + len(chunk)]
+        membership = sparse.csr_matrix((np.ones(len(chunk)), (chunk_codes, np.arange(len(chunk)))),
+                                       shape=(k, len(chunk)))
+        sums += membership @ chunk
+        sq_norms += np.bincount(chunk_codes, weights=np.einsum('ij,ij->i', chunk, chunk), minlength=k)
+        offset += len(chunk)
+    centroids = sums / counts[:, None]
+    within_ss = sq_norms - counts * np.einsum('ij,ij->i', centroids, centroids)
+    return {
+        'codes': codes,
+        'counts': counts,
+        'centroids': centroids,
+        'within_ss': np.maximum(within_ss, 0.0)
+    }
+
+def centroid_scores(features, labels, chunk_size=10000, cluster_stats=None):
+    """Calinski-Harabasz and Davies-Bouldin from shared per-cluster centroid statistics"""
+    cluster_stats = cluster_stats or cluster_statistics(features, labels, chunk_size)
+    codes, counts, centroids = cluster_stats['codes'], cluster_stats['counts'], cluster_stats['centroids']
+    n, k = len(codes), len(counts)
+
+    overall = (counts[:, None] * centroids).sum(axis=0) / n
+    between = float((counts * ((centroids - overall) ** 2).sum(axis=1)).sum())
+    within = float(cluster_stats['within_ss'].sum())
+    calinski = 1.0 if within == 0 else between * (n - k) / (within * (k - 1))
+
+    # Davies-Bouldin needs the mean (not squared) distance to each centroid
+    intra = np.zeros(k, dtype=np.float64)
+    offset = 0
+    for chunk in iter_feature_chunks(features, chunk_size):
+        chunk_codes = codes[offset:offset + len(chunk)]
+        distances = np.linalg.norm(chunk - centroids[chunk_codes], axis=1)
+        intra += np.bincount(chunk_codes, weights=distances, minlength=k)
+        offset += len(chunk)
+    intra /= counts
+    centroid_distances = np.linalg.norm(centroids[:, None, :] - centroids[None, :, :], axis=2)
+    if np.allclose(intra, 0) or np.allclose(centroid_distances, 0):
+        davies = 0.0
+    else:
+        centroid_distances[centroid_distances == 0] = np.inf
+        davies = float(np.max((intra[:, None] + intra[None, :]) / centroid_distances, axis=1).mean())
+
+    return {'calinski': calinski, 'davies': davies}
+
+def silhouette_from_blocks(blocks, labels):
+    """Mean silhouette from an iterable of (start_row, distance rows) blocks"""
+    codes, counts = _encode_labels(labels)
+    n = len(codes)
+    one_hot = np.zeros((n, len(counts)), dtype=np.float32)
+    one_hot[np.arange(n), codes] = 1.0
+
+    total = 0.0
+    for start, distances in blocks:
+        # Sum of distances from each row to every cluster, as one GEMM
+        cluster_sums = distances @ one_hot
+        own = codes[start:start + len(distances)]
+        rows = np.arange(len(distances))
+
+        own_counts = counts[own] - 1
+        a = np.divide(cluster_sums[rows, own], own_counts,
+                      out=np.zeros(len(distances)), where=own_counts > 0)
+        mean_other = cluster_sums / counts[None, :]
+        mean_other[rows, own] = np.inf
+        b = mean_other.min(axis=1)
+        s = np.where(own_counts > 0, (b - a) / np.maximum(a, b), 0.0)
+        total += float(np.nan_to_num(s).sum())
+    return total / n
+
+def chunked_silhouette(features, labels, chunk_size=1000):
+    """Exact mean silhouette with memory bounded to chunk_size x N distances"""
+    features = np.asarray(features, dtype=np.float32)
+    norms = np.einsum('ij,ij->i', features, features)
+
+    def blocks():
+        for start in range(0, len(features), chunk_size):
+            chunk = features[start:start + chunk_size]
+            d2 = norms[start:start + len(chunk), None] + norms[None, :] - 2.0 * chunk @ features.T
+            rows = np.arange(len(chunk))
+            d2[rows, start + rows] = 0.0
+            yield start, np.sqrt(np.maximum(d2, 0.0, out=d2), out=d2)
+
+    return silhouette_from_blocks(blocks(), labels)
+
+def stratified_sample(labels, sample_size, rng):
+    """Row indices sampled proportionally to cluster size, at least two per cluster"""
+    codes, counts = _encode_labels(labels)
+    quota = np.maximum(np.round(counts * sample_size / len(codes)).astype(int), 2)
+    quota = np.minimum(quota, counts)
+    order = np.argsort(codes, kind='stable')
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    picks = [order[offsets[c]:offsets[c + 1]][rng.choice(counts[c], quota[c], replace=False)]
+             for c in range(len(counts))]
+    return np.sort(np.concatenate(picks))
+
+def subsampled_silhouette(features, labels, sample_size=5000, n_repeats=5,
+                          stratified=True, confidence=0.95, random_state=0):
+    """Mean silhouette over repeated subsamples with a t-based confidence interval"""
+    labels = np.asarray(labels)
+    if len(labels) <= sample_size:
+        score = silhouette_score(features, labels)
+        return {'silhouette': score, 'std': 0.0, 'ci_low': score, 'ci_high': score, 'n_repeats': 1}
+
+    rng = np.random.default_rng(random_state)
+    scores = []
+    for _ in range(n_repeats):
+        if stratified:
+            rows = stratified_sample(labels, sample_size, rng)
+        else:
+            rows = np.sort(rng.choice(len(labels), sample_size, replace=False))
+        if len(np.unique(labels[rows])) < 2:
+            continue
+        scores.append(silhouette_score(np.asarray(features[rows]), labels[rows]))
+
+    scores = np.asarray(scores)
+    mean = float(scores.mean())
+    std = float(scores.std(ddof=1)) if len(scores) > 1 else 0.0
+    half_width = (stats.t.ppf((1 + confidence) / 2, len(scores) - 1) * std / np.sqrt(len(scores))
+                  if len(scores) > 1 else 0.0)
+    return {'silhouette': mean, 'std': std, 'ci_low': mean - half_width,
+            'ci_high': mean + half_width, 'n_repeats': len(scores)}
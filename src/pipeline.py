@@ -0,0 +1,263 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from .checkpoint_manager import CheckpointManager
+from .clustering import METHOD_NAMES
+from .manifest import ImageManifest, build_manifest
+
+class Stage:
+    def __init__(self, name, func, deps=(), params=None):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = params or {}
+
+class Pipeline:
+    """DAG of stages with content-hashed inputs and concurrent execution.
+
+    A stage's key hashes its name, parameters and the keys of its
+    dependencies, so it changes whenever anything upstream changes. Outputs are
+    pickled under ``cache_dir`` by key, and a stage whose key already has an
+    output is skipped. Stages whose dependencies are done run concurrently.
+    """
+
+    def __init__(self, cache_dir='pipeline_cache', max_workers=4):
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.stages = {}
+        self.timings = []
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def add(self, name, func, deps=(), params=None):
+        """Register a stage; ``func(inputs, **params)`` gets ``{dep_name: output}``"""
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{name}' depends on unknown stages {missing}")
+        self.stages[name] = Stage(name, func, deps, params)
+        return name
+
+    def _key(self, stage, keys):
+        payload = json.dumps({
+            'stage': stage.name,
+            'params': stage.params,
+            'deps': [keys[d] for d in stage.deps]
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _output_path(self, stage, key):
+        safe_name = stage.name.replace('/', '_')
+        return os.path.join(self.cache_dir, f'{safe_name}-{key[:16]}.pkl')
+
+    def _run_stage(self, stage, inputs, key):
+        start = time.perf_counter()
+        output = stage.func(inputs, **stage.params)
+        elapsed = time.perf_counter() - start
+        path = self._output_path(stage, key)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(output, f)
+        os.replace(path + '.tmp', path)
+        return output, elapsed
+
+    def run(self):
+        """Execute all stages and return {stage_name: output}"""
+        keys, outputs = {}, {}
+        self.timings = []
+        remaining = dict(self.stages)
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while remaining or running:
+                ready = [s for s in remaining.values() if all(d in outputs for d in s.deps)]
+                for stage in ready:
+                    del remaining[stage.name]
+                    keys[stage.name] = key = self._key(stage, keys)
+                    path = self._output_path(stage, key)
+                    if os.path.exists(path):
+                        with open(path, 'rb') as f:
+                            outputs[stage.name] = pickle.load(f)
+                        self.timings.append((stage.name, 'cached', 0.0))
+                        continue
+                    inputs = {d: outputs[d] for d in stage.deps}
+                    running[pool.submit(self._run_stage, stage, inputs, key)] = stage.name
+
+                if any(s for s in remaining.values() if all(d in outputs for d in s.deps)):
+                    # A cached stage just unlocked more work; schedule it before waiting
+                    continue
+                if not running:
+                    if remaining:
+                        raise RuntimeError(f"Unresolvable stages: {sorted(remaining)}")
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outputs[name], elapsed = future.result()
+                    self.timings.append((name, 'ran', elapsed))
+        return outputs
+
+    def print_timings(self):
+        width = max([len(name) for name, _, _ in self.timings] + [5])
+        print(f"\n{'Stage':<{width}}  {'Status':<7}  {'Seconds':>9}")
+        print('-' * (width + 20))
+        for name, status, elapsed in self.timings:
+            print(f"{name:<{width}}  {status:<7}  {elapsed:>9.2f}")
+        print('-' * (width + 20))
+        print(f"{'Total (sum)':<{width}}  {'':<7}  {sum(t for _, _, t in self.timings):>9.2f}")
+
+# Methods that accept init_centroids (KMeans-family inits and GMM means)
+WARM_START_METHODS = ('kmeans', 'minibatch_kmeans', 'gmm')
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+def _checkpoint_manager(checkpoint_dir):
+    """One shared CheckpointManager per directory, so concurrent stages don't clobber progress"""
+    with _managers_lock:
+        key = os.path.abspath(checkpoint_dir)
+        if key not in _managers:
+            _managers[key] = CheckpointManager(checkpoint_dir)
+        return _managers[key]
+
+def _extract(inputs, model_name, manifest_dir, dataset, pooling, checkpoint_dir, batch_size):
+    from .feature_extractor import FeatureExtractor
+
+    manager = _checkpoint_manager(checkpoint_dir)
+    extractor = FeatureExtractor(model_name=model_name, batch_size=batch_size, pooling=pooling)
+    store = manager.extract_features(extractor, ImageManifest(manifest_dir))
+    return {'store_root': store.root, 'fingerprint': store.fingerprint()}
+
+def _reduce(inputs, model_name, method, n_components):
+    from .feature_store import FeatureStore
+    from .reduction import get_reduced_features
+
+    store = FeatureStore(inputs[f'extract/{model_name}']['store_root'])
+    return {'path': get_reduced_features(store, method, n_components).filename}
+
+def _cluster(inputs, model_name, method, n_clusters, random_state, checkpoint_dir):
+    import numpy as np
+    from .clustering import ImageClustering
+
+    features = np.load(inputs[f'reduce/{model_name}']['path'], mmap_mode='r')
+    # Warm-start from the previous run's centroids. They are read here rather than
+    # being a stage param, so they don't change the stage key
+    previous = (_checkpoint_manager(checkpoint_dir).load_centroids(model_name) or {}).get(METHOD_NAMES[method])
+    init_centroids = None
+    if (method in WARM_START_METHODS and previous is not None
+            and previous.shape == (n_clusters, features.shape[1])):
+        init_centroids = previous
+    clustering = ImageClustering(method=method, n_clusters=n_clusters, random_state=random_state,
+                                 init_centroids=init_centroids)
+    labels = clustering.fit_predict(features)
+    return {'labels': labels, 'centroids': clustering.warm_start_centroids(),
+            'fit_time': clustering.fit_time_}
+
+def _evaluate(inputs, model_name, methods, reduction, n_components, checkpoint_dir, results_dir):
+    import numpy as np
+    from .analysis import ModelAnalyzer
+    from .feature_store import FeatureStore
+    from .reduction import get_projection_2d
+    from .visualization import AdvancedVisualizer
+
+    features = np.load(inputs[f'reduce/{model_name}']['path'], mmap_mode='r')
+    results = {METHOD_NAMES[m]: inputs[f'cluster/{model_name}/{m}']['labels'] for m in methods}
+    centroids = {METHOD_NAMES[m]: inputs[f'cluster/{model_name}/{m}']['centroids'] for m in methods}
+
+    manager = _checkpoint_manager(checkpoint_dir)
+    manager.save_clustering_results(model_name, results)
+    manager.save_centroids(model_name, centroids)
+
+    store = FeatureStore(inputs[f'extract/{model_name}']['store_root'])
+    projection = get_projection_2d(store, reduction, n_components)
+    visualizer = AdvancedVisualizer(results_dir)
+    for method, labels in results.items():
+        visualizer.plot_clustering_results(projection, labels, model_name, method)
+
+    analyzer = ModelAnalyzer(silhouette='subsample')
+    metrics = analyzer.analyze_model(model_name, features, results)
+    # Report the backbone's embedding size, not the shared reduced size
+    metrics['n_features'] = store.n_features
+    return metrics
+
+def _report(inputs, results_dir):
+    from .analysis import ModelAnalyzer
+    from .results_analyzer import ResultsAnalyzer
+    from .comprehensive_evaluator import ComprehensiveEvaluator
+    from .final_report_generator import FinalReportGenerator
+
+    analyzer = ModelAnalyzer()
+    analyzer.results = {name.split('/', 1)[1]: metrics for name, metrics in inputs.items()}
+    report = analyzer.generate_comparison_report()
+    report.to_csv(os.path.join(results_dir, 'model_comparison.csv'), index=False)
+
+    ResultsAnalyzer(results_dir).generate_comprehensive_report(report)
+    ComprehensiveEvaluator(results_dir).evaluate_all_results()
+    FinalReportGenerator(results_dir).generate_final_report()
+    return report
+
+def build_pipeline(image_dir, models=('vgg16', 'resnet50', 'inception'),
+                   methods=('kmeans', 'dbscan', 'hierarchical', 'gmm'), n_clusters=5,
+                   pooling='avg', reduction='ipca', n_components=256, random_state=0,
+                   batch_size=32, checkpoint_dir='checkpoints', results_dir='results',
+                   cache_dir='pipeline_cache', max_workers=4):
+    """extract -> reduce -> cluster -> evaluate per backbone, then a single report stage"""
+    os.makedirs(results_dir, exist_ok=True)
+    pipeline = Pipeline(cache_dir=cache_dir, max_workers=max_workers)
+    # Incremental rescan: only directories modified since the last run are re-stat'ed
+    manifest_dir = os.path.join(cache_dir, 'manifest')
+    dataset = build_manifest(image_dir, manifest_dir).fingerprint()
+
+    evaluations = []
+    for model_name in models:
+        extract = pipeline.add(f'extract/{model_name}', _extract, params={
+            'model_name': model_name, 'manifest_dir': manifest_dir, 'dataset': dataset,
+            'pooling': pooling, 'checkpoint_dir': checkpoint_dir, 'batch_size': batch_size
+        })
+        reduce = pipeline.add(f'reduce/{model_name}', _reduce, deps=[extract], params={
+            'model_name': model_name, 'method': reduction, 'n_components': n_components
+        })
+        clusters = [
+            pipeline.add(f'cluster/{model_name}/{method}', _cluster, deps=[reduce], params={
+                'model_name': model_name, 'method': method, 'n_clusters': n_clusters,
+                'random_state': random_state, 'checkpoint_dir': checkpoint_dir
+            })
+            for method in methods
+        ]
+        evaluations.append(pipeline.add(f'evaluate/{model_name}', _evaluate,
+                                        deps=[extract, reduce, *clusters], params={
+            'model_name': model_name, 'methods': list(methods), 'reduction': reduction,
+            'n_components': n_components, 'checkpoint_dir': checkpoint_dir, 'results_dir': results_dir
+        }))
+    pipeline.add('report', _report, deps=evaluations, params={'results_dir': results_dir})
+    return pipeline
+
+def main():
+    parser = argparse.ArgumentParser(description='MedTransCluster pipeline')
+    parser.add_argument('--image-dir', default='data')
+    parser.add_argument('--models', nargs='+', default=['vgg16', 'resnet50', 'inception'])
+    parser.add_argument('--methods', nargs='+', default=['kmeans', 'dbscan', 'hierarchical', 'gmm'])
+    parser.add_argument('--n-clusters', type=int, default=5)
+    parser.add_argument('--pooling', default='avg')
+    parser.add_argument('--reduction', default='ipca')
+    parser.add_argument('--n-components', type=int, default=256)
+    parser.add_argument('--random-state', type=int, default=0)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--checkpoint-dir', default='checkpoints')
+    parser.add_argument('--results-dir', default='results')
+    parser.add_argument('--cache-dir', default='pipeline_cache')
+    parser.add_argument('--jobs', type=int, default=4)
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(args.image_dir, args.models, args.methods, args.n_clusters,
+                              args.pooling, args.reduction, args.n_components, args.random_state,
+                              args.batch_size, args.checkpoint_dir, args.results_dir,
+                              args.cache_dir, args.jobs)
+    pipeline.run()
+    pipeline.print_timings()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import numpy as np
+
+# Per-backbone input size and normalization, matching keras.applications.
+# 'caffe' models expect BGR with ImageNet means subtracted, 'tf' models expect
+# RGB scaled to [-1, 1].
+PREPROCESSING = {
+    'vgg16': {
+        'input_size': (224, 224),
+        'channel_order': 'bgr',
+        'mean': (103.939, 116.779, 123.68),
+        'std': (1.0, 1.0, 1.0)
+    },
+    'resnet50': {
+        'input_size': (224, 224),
+        'channel_order': 'bgr',
+        'mean': (103.939, 116.779, 123.68),
+        'std': (1.0, 1.0, 1.0)
+    },
+    'inception': {
+        'input_size': (299, 299),
+        'channel_order': 'rgb',
+        'mean': (127.5, 127.5, 127.5),
+        'std': (127.5, 127.5, 127.5)
+    }
+}
+
+def get_preprocessing(model_name):
+    """Return the preprocessing spec registered for a backbone"""
+    if model_name not in PREPROCESSING:
+        raise ValueError(f"No preprocessing registered for '{model_name}'")
+    return PREPROCESSING[model_name]
+
+def preprocess_batch(batch, model_name):
+    """Apply a backbone's preprocessing to a (N, H, W, 3) RGB batch in one vectorized pass"""
+    spec = get_preprocessing(model_name)
+    batch = np.asarray(batch, dtype=np.float32)
+    if spec['channel_order'] == 'bgr':
+        batch = batch[..., ::-1]
+    mean = np.asarray(spec['mean'], dtype=np.float32)
+    inv_std = 1.0 / np.asarray(spec['std'], dtype=np.float32)
+    return np.ascontiguousarray((batch - mean) * inv_std)
+
+def preprocess_tensor(x, model_name):
+    """TensorFlow version of preprocess_batch, for fusing into the inference graph"""
+    import tensorflow as tf
+
+    spec = get_preprocessing(model_name)
+    x = tf.cast(x, tf.float32)
+    if spec['channel_order'] == 'bgr':
+        x = tf.reverse(x, axis=[-1])
+    mean = tf.constant(spec['mean'], dtype=tf.float32)
+    inv_std = tf.constant([1.0 / s for s in spec['std']], dtype=tf.float32)
+    return (x - mean) * inv_std
@@ -0,0 +1,65 @@
+import os
+import numpy as np
+
+QUANTIZATION_MODES = ('dynamic', 'float16', 'int8')
+
+def convert_to_tflite(model, input_size, mode='dynamic', representative_batches=None):
+    """Convert a Keras backbone to a post-training quantized TFLite flatbuffer.
+
+    ``int8`` calibrates activation ranges on ``representative_batches``, an
+    iterable of preprocessed (N, H, W, 3) float32 arrays drawn from our images.
+    """
+    import tensorflow as tf
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization '{mode}', expected one of {QUANTIZATION_MODES}")
+    if mode == 'int8' and representative_batches is None:
+        raise ValueError("int8 quantization needs representative_batches for calibration")
+
+    fn = tf.function(lambda x: model(x, training=False),
+                     input_signature=[tf.TensorSpec([1, *input_size, 3], tf.float32)])
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([fn.get_concrete_function()], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if mode == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        def representative_dataset():
+            for batch in representative_batches:
+                for sample in batch:
+                    yield [np.asarray(sample, dtype=np.float32)[np.newaxis]]
+        converter.representative_dataset = representative_dataset
+    return converter.convert()
+
+class TFLiteBackbone:
+    """Callable wrapper running a TFLite backbone on (N, H, W, 3) batches"""
+
+    def __init__(self, model_path, num_threads=None):
+        import tensorflow as tf
+
+        self.model_path = model_path
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=num_threads)
+        self.input_index = self.interpreter.get_input_details()[0]['index']
+        self.output_index = self.interpreter.get_output_details()[0]['index']
+        self._batch_shape = None
+
+    def __call__(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.shape != self._batch_shape:
+            self.interpreter.resize_tensor_input(self.input_index, batch.shape)
+            self.interpreter.allocate_tensors()
+            self._batch_shape = batch.shape
+        self.interpreter.set_tensor(self.input_index, batch)
+        self.interpreter.invoke()
+        return self.interpreter.get_tensor(self.output_index)
+
+def load_or_convert(model_fn, model_path, input_size, mode, representative_batches=None,
+                    num_threads=None):
+    """Reuse a converted model from disk, converting it on first use"""
+    if not os.path.exists(model_path):
+        os.makedirs(os.path.dirname(model_path) or '.', exist_ok=True)
+        flatbuffer = convert_to_tflite(model_fn(), input_size, mode, representative_batches)
+        tmp_path = model_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(flatbuffer)
+        os.replace(tmp_path, model_path)
+    return TFLiteBackbone(model_path, num_threads=num_threads)
@@ -0,0 +1,126 @@
+import os
+import pickle
+import numpy as np
+from sklearn.decomposition import PCA, IncrementalPCA
+from sklearn.random_projection import SparseRandomProjection
+from .clustering import iter_feature_chunks
+
+REDUCTION_METHODS = ('ipca', 'pca', 'random_projection')
+
+class FeatureReducer:
+    """Dimensionality reduction applied before clustering, evaluation and plotting.
+
+    ``ipca`` streams over memmapped chunks with IncrementalPCA, ``pca`` uses
+    randomized SVD on (a sample of) the features and ``random_projection`` is a
+    data-independent sparse random projection.
+    """
+
+    def __init__(self, method='ipca', n_components=256, max_samples=50000, random_state=0):
+        if method not in REDUCTION_METHODS:
+            raise ValueError(f"Unknown reduction '{method}', expected one of {REDUCTION_METHODS}")
+        self.method = method
+        self.n_components = n_components
+        self.max_samples = max_samples
+        self.random_state = random_state
+        self.model = None
+
+    def fit(self, source, chunk_size=10000):
+        n_components = min(self.n_components, _n_features(source), len(source))
+        if self.method == 'ipca':
+            self.model = IncrementalPCA(n_components=n_components)
+            chunk_size = max(chunk_size, n_components)
+            for chunk in _min_rows_chunks(iter_feature_chunks(source, chunk_size), n_components):
+                self.model.partial_fit(chunk)
+        elif self.method == 'pca':
+            sample = _sample_rows(source, self.max_samples, self.random_state)
+            self.model = PCA(n_components=min(n_components, len(sample)), svd_solver='randomized',
+                             random_state=self.random_state).fit(sample)
+        else:
+            self.model = SparseRandomProjection(n_components=n_components,
+                                                random_state=self.random_state)
+            self.model.fit(next(iter_feature_chunks(source, chunk_size)))
+        return self
+
+    @property
+    def output_dim(self):
+        probe = np.zeros((1, self.model.n_features_in_), dtype=np.float32)
+        return self.model.transform(probe).shape[1]
+
+    def transform(self, source, chunk_size=10000, out=None):
+        """Project chunk-wise into ``out`` (or a new float32 array)"""
+        if out is None:
+            out = np.empty((len(source), self.output_dim), dtype=np.float32)
+        offset = 0
+        for chunk in iter_feature_chunks(source, chunk_size):
+            out[offset:offset + len(chunk)] = self.model.transform(chunk)
+            offset += len(chunk)
+        return out
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+def _n_features(source):
+    return source.n_features if hasattr(source, 'n_features') else source.shape[1]
+
+def _min_rows_chunks(chunks, min_rows):
+    """Re-yield chunks, merging any chunk shorter than min_rows into its neighbour"""
+    held = None
+    for chunk in chunks:
+        if held is None:
+            held = chunk
+        elif len(held) < min_rows or len(chunk) < min_rows:
+            held = np.concatenate([held, chunk])
+        else:
+            yield held
+            held = chunk
+    if held is not None:
+        yield held
+
+def _sample_rows(source, max_samples, random_state):
+    features = source.load()[0] if hasattr(source, 'load') else source
+    if len(features) <= max_samples:
+        return np.asarray(features, dtype=np.float32)
+    rng = np.random.default_rng(random_state)
+    rows = np.sort(rng.choice(len(features), max_samples, replace=False))
+    return np.asarray(features[rows], dtype=np.float32)
+
+def get_reduced_features(store, method='ipca', n_components=256, chunk_size=10000):
+    """Reduced features for a FeatureStore, fitted once and cached next to the shards.
+
+    Returns a read-only memmap; clustering, evaluation and visualization all
+    read the same file instead of each re-projecting the raw features.
+    """
+    key = f"{method}_{n_components}_{store.fingerprint()[:12]}"
+    features_path = os.path.join(store.root, f'reduced_{key}.npy')
+    reducer_path = os.path.join(store.root, f'reducer_{key}.pkl')
+    if os.path.exists(features_path) and os.path.exists(reducer_path):
+        return np.load(features_path, mmap_mode='r')
+
+    reducer = FeatureReducer(method, n_components).fit(store, chunk_size)
+    tmp_path = os.path.join(store.root, f'reduced_{key}.tmp.npy')
+    out = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=np.float32,
+                                    shape=(len(store), reducer.output_dim))
+    reducer.transform(store, chunk_size, out=out)
+    out.flush()
+    del out
+    os.replace(tmp_path, features_path)
+    reducer.save(reducer_path)
+    return np.load(features_path, mmap_mode='r')
+
+def get_projection_2d(store, method='ipca', n_components=256):
+    """2-D projection for Visualizer plots, derived from the cached reduced features"""
+    key = f"2d_{method}_{n_components}_{store.fingerprint()[:12]}"
+    path = os.path.join(store.root, f'reduced_{key}.npy')
+    if os.path.exists(path):
+        return np.load(path)
+    reduced = get_reduced_features(store, method, n_components)
+    projection = PCA(n_components=2, svd_solver='randomized', random_state=0).fit_transform(
+        np.asarray(reduced)).astype(np.float32)
+    np.save(path, projection)
+    return projection
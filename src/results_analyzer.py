@@ -1,11 +1,6 @@
 import os
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 
 class ResultsAnalyzer:
     def __init__(self, results_dir='results', analysis_dir='analysis'):
@@ -38,6 +33,9 @@ def generate_comprehensive_report(self, comparison_report):
 
     def _analyze_model_performance(self, df):
         """Analyze and visualize model performance"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         metrics = ['Silhouette Score', 'Calinski-Harabasz Score', 'Davies-Bouldin Score']
         
         # Performance comparison plot
@@ -64,6 +62,9 @@ def _analyze_model_performance(self, df):
 
     def _analyze_clustering_methods(self, df):
         """Analyze clustering methods performance"""
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+
         # Clustering methods comparison
         plt.figure(figsize=(12, 6))
         sns.boxplot(data=df, x='Clustering Method', y='Silhouette Score', hue='Model')
@@ -0,0 +1,112 @@
+import os
+import argparse
+import multiprocessing as mp
+from .checkpoint_manager import CheckpointManager
+from .utils import limit_blas_threads
+
+def partition_paths(n_images, n_shards):
+    """Split [0, n_images) into n_shards contiguous, deterministic [start, end) ranges"""
+    base, extra = divmod(n_images, n_shards)
+    ranges = []
+    start = 0
+    for shard_index in range(n_shards):
+        end = start + base + (1 if shard_index < extra else 0)
+        ranges.append((start, end))
+        start = end
+    return ranges
+
+def _part_dir(output_dir, model_name, shard_index):
+    return os.path.join(output_dir, f'{model_name}_parts', f'part_{shard_index:05d}')
+
+def _limit_threads(num_threads):
+    """Cap BLAS/TensorFlow threads so N workers do not oversubscribe the cores"""
+    # numpy is already imported here, so env vars would be ignored; limit the live pools
+    limit_blas_threads(num_threads)
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(num_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def _extract_part(part_paths, shard_index, model_name, output_dir,
+                  num_threads=1, shard_size=1000, extractor_kwargs=None):
+    """Extract an already-sliced partition into its own resumable part store"""
+    from .feature_extractor import FeatureExtractor
+
+    _limit_threads(num_threads)
+    extractor = FeatureExtractor(model_name=model_name, num_threads=num_threads,
+                                 **(extractor_kwargs or {}))
+    manager = CheckpointManager(_part_dir(output_dir, model_name, shard_index))
+    manager.extract_features(extractor, part_paths, model_name=model_name, shard_size=shard_size)
+    return shard_index
+
+def run_shard(image_paths, shard_index, n_shards, model_name, output_dir,
+              num_threads=1, shard_size=1000, extractor_kwargs=None):
+    """Extract one partition of the full image list (used by --shard-index)"""
+    start, end = partition_paths(len(image_paths), n_shards)[shard_index]
+    return _extract_part(list(image_paths[start:end]), shard_index, model_name, output_dir,
+                         num_threads, shard_size, extractor_kwargs)
+
+def _extract_part_star(args):
+    return _extract_part(*args)
+
+def merge_shards(output_dir, model_name, n_shards):
+    """Concatenate part stores in shard order into the model's main feature store"""
+    store = CheckpointManager(output_dir).feature_store(model_name)
+    store.clear()
+    shard_id = 0
+    for shard_index in range(n_shards):
+        part = CheckpointManager(_part_dir(output_dir, model_name, shard_index))
+        if not part.progress['features_extracted'].get(model_name):
+            raise RuntimeError(f"Shard {shard_index} of {model_name} has not finished")
+        for features, paths in part.feature_store(model_name).iter_shards():
+            store.append(features, paths, shard_id=shard_id)
+            shard_id += 1
+    return store
+
+def run_sharded_extraction(image_paths, model_name, output_dir='checkpoints', n_workers=None,
+                           threads_per_worker=None, shard_size=1000, extractor_kwargs=None):
+    """Extract features with N independent worker processes and merge them in order"""
+    n_workers = n_workers or os.cpu_count() or 1
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // n_workers)
+    # Each task carries only its own slice, not a copy of the whole list
+    tasks = [
+        (list(image_paths[start:end]), shard_index, model_name, output_dir,
+         threads_per_worker, shard_size, extractor_kwargs)
+        for shard_index, (start, end) in enumerate(partition_paths(len(image_paths), n_workers))
+    ]
+    # spawn gives each worker a clean TensorFlow runtime
+    with mp.get_context('spawn').Pool(n_workers) as pool:
+        for shard_index in pool.imap_unordered(_extract_part_star, tasks):
+            print(f"{model_name}: shard {shard_index + 1}/{n_workers} done")
+    return merge_shards(output_dir, model_name, n_workers)
+
+def main():
+    parser = argparse.ArgumentParser(description='Sharded feature extraction')
+    parser.add_argument('--image-list', required=True, help='Text file with one image path per line')
+    parser.add_argument('--model', default='vgg16')
+    parser.add_argument('--output-dir', default='checkpoints')
+    parser.add_argument('--num-shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--shard-index', type=int, default=None,
+                        help='Run only this shard (for spreading shards across machines)')
+    parser.add_argument('--merge', action='store_true', help='Merge finished shards and exit')
+    parser.add_argument('--threads', type=int, default=None, help='Intra-op threads per worker')
+    parser.add_argument('--shard-size', type=int, default=1000)
+    parser.add_argument('--pooling', default='flatten')
+    args = parser.parse_args()
+
+    if args.merge:
+        merge_shards(args.output_dir, args.model, args.num_shards)
+        return
+
+    with open(args.image_list, 'r') as f:
+        image_paths = [line.strip() for line in f if line.strip()]
+    extractor_kwargs = {'pooling': args.pooling}
+
+    if args.shard_index is not None:
+        run_shard(image_paths, args.shard_index, args.num_shards, args.model, args.output_dir,
+                  args.threads or 1, args.shard_size, extractor_kwargs)
+    else:
+        run_sharded_extraction(image_paths, args.model, args.output_dir, args.num_shards,
+                               args.threads, args.shard_size, extractor_kwargs)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import os
+import json
+import inspect
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sklearn.neighbors import NearestNeighbors
+from .analysis import ModelAnalyzer
+from .clustering import ImageClustering, METHOD_NAMES
+from .label_alignment import align_results
+from .utils import limit_blas_threads
+
+class PrecomputedRadiusGraph:
+    """Radius-neighbours graph computed once at the largest eps and filtered for smaller ones.
+
+    Exposes the same ``radius_neighbors_graph(eps)`` interface as IVFIndex so
+    it can be handed to ImageClustering(method='dbscan', ann_index=...).
+    """
+
+    def __init__(self, features, max_eps):
+        self.max_eps = max_eps
+        self.graph = NearestNeighbors(radius=max_eps).fit(features).radius_neighbors_graph(
+            features, mode='distance').tocsr()
+
+    def radius_neighbors_graph(self, eps):
+        if eps > self.max_eps:
+            raise ValueError(f"eps={eps} exceeds the precomputed radius {self.max_eps}")
+        coo = self.graph.tocoo()
+        keep = coo.data <= eps
+        # Built from COO so explicit zero distances (duplicate images) survive
+        return sparse.csr_matrix((coo.data[keep], (coo.row[keep], coo.col[keep])),
+                                 shape=self.graph.shape)
+
+def expand_grid(params):
+    """{'n_clusters': [2, 3], ...} -> [{'n_clusters': 2, ...}, {'n_clusters': 3, ...}]"""
+    keys = sorted(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*(params[k] for k in keys))]
+
+def _run_task(model_name, features_path, method, param_sets):
+    """Fit every parameter set of one (model, method) on the shared memmapped features.
+
+    Returns (score rows, {run name: labels}); the run name is the row's
+    'Clustering Method' value, i.e. the method with its parameters.
+    """
+    features = np.load(features_path, mmap_mode='r')
+    ann_index = None
+    if method == 'dbscan':
+        # One neighbour search at the largest eps serves every eps/min_samples pair
+        default_eps = inspect.signature(ImageClustering).parameters['eps'].default
+        ann_index = PrecomputedRadiusGraph(features, max(p.get('eps', default_eps) for p in param_sets))
+
+    rows, run_labels = [], {}
+    for params in param_sets:
+        clustering = ImageClustering(method=method, ann_index=ann_index, **params)
+        labels = clustering.fit_predict(features)
+        analyzer = ModelAnalyzer()
+        label = f"{METHOD_NAMES.get(method, method)}({', '.join(f'{k}={v}' for k, v in params.items())})"
+        analyzer.analyze_model(model_name, features, {label: labels})
+        report = analyzer.generate_comparison_report()
+        if report.empty:
+            continue
+        row = report.iloc[0].to_dict()
+        row['Parameters'] = json.dumps(params, sort_keys=True)
+        row['Fit Time (s)'] = clustering.fit_time_
+        row['Number of Clusters Found'] = len(set(labels) - {-1})
+        rows.append(row)
+        run_labels[label] = np.asarray(labels, dtype=np.int32)
+    return rows, run_labels
+
+class ClusteringSweep:
+    """Run a clustering hyperparameter grid per backbone in a process pool.
+
+    ``grid`` maps method names to parameter lists, e.g.
+    ``{'kmeans': {'n_clusters': range(2, 11)}, 'dbscan': {'eps': [0.3, 0.5], 'min_samples': [5, 10]}}``.
+    Workers open the features with ``np.load(mmap_mode='r')`` instead of
+    receiving the matrix, so nothing large is pickled per task.
+
+    Each run's labels are kept in ``labels_`` as ``{model: {run name: labels}}``
+    and aligned to a reference run per model; the maps are in ``alignment_maps_``.
+    """
+
+    def __init__(self, grid, n_jobs=None, blas_threads=1):
+        self.grid = grid
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.blas_threads = blas_threads
+        self.labels_ = {}
+        self.alignment_maps_ = {}
+
+    def _tasks(self, feature_paths):
+        for model_name, features_path in feature_paths.items():
+            for method, params in self.grid.items():
+                param_sets = expand_grid(params)
+                if method == 'dbscan':
+                    yield model_name, features_path, method, param_sets
+                else:
+                    for param_set in param_sets:
+                        yield model_name, features_path, method, [param_set]
+
+    def run(self, feature_paths, output_csv=None, checkpoint_dir=None, reference=None):
+        """Sweep every backbone in ``{model_name: path to .npy features}``.
+
+        ``reference`` names the run every other run is aligned to (default: the
+        first run name in sorted order). With ``checkpoint_dir`` the labels and
+        alignment maps are persisted under ``<model>_sweep`` in that directory.
+        """
+        rows = []
+        labels = {model_name: {} for model_name in feature_paths}
+        with ProcessPoolExecutor(max_workers=self.n_jobs, initializer=limit_blas_threads,
+                                 initargs=(self.blas_threads,)) as pool:
+            futures = {pool.submit(_run_task, *task): task[0] for task in self._tasks(feature_paths)}
+            for future in as_completed(futures):
+                task_rows, task_labels = future.result()
+                rows.extend(task_rows)
+                labels[futures[future]].update(task_labels)
+
+        self.labels_ = {model_name: dict(sorted(runs.items())) for model_name, runs in labels.items()}
+        self.alignment_maps_ = {
+            model_name: align_results(runs, reference)[1]
+            for model_name, runs in self.labels_.items() if runs
+        }
+        if checkpoint_dir:
+            from .checkpoint_manager import CheckpointManager
+
+            manager = CheckpointManager(checkpoint_dir)
+            for model_name, maps in self.alignment_maps_.items():
+                manager.save_sweep_labels(f'{model_name}_sweep', self.labels_[model_name])
+                manager.save_alignment_maps(f'{model_name}_sweep', maps)
+
+        report = pd.DataFrame(rows)
+        if not report.empty:
+            report = report.sort_values(['Model', 'Clustering Method']).reset_index(drop=True)
+        if output_csv:
+            report.to_csv(output_csv, index=False)
+        return report
@@ -10,9 +10,12 @@ def validate_image_directory(directory):
     if not os.path.exists(directory):
         raise ValueError(f"Directory {directory} does not exist")
     
-    valid_extensions = ('.png', '.jpg', '.jpeg')
-    images = [f for f in os.listdir(directory) 
-             if f.lower().endswith(valid_extensions)]
-    
-    if not images:
-        raise ValueError(f"No valid images found in {directory}") 
\ No newline at end of file
+    from .manifest import scan_images
+    # Stop at the first image found anywhere in the tree
+    if next(scan_images(directory), None) is None:
+        raise ValueError(f"No valid images found in {directory}")
+
+def limit_blas_threads(num_threads):
+    """Cap BLAS/OpenMP threads in a worker process to avoid oversubscription."""
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(num_threads)
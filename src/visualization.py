@@ -1,9 +1,5 @@
 import os
 import pandas as pd
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 from .utils import create_directory
 import numpy as np
 
@@ -16,6 +12,8 @@ def __init__(self, output_dir='results'):
         
     def plot_clusters(self, features_reduced, results):
         """Generate interactive plots for each clustering method."""
+        import plotly.express as px
+
         for method, labels in results.items():
             df = pd.DataFrame({
                 'PC1': features_reduced[:, 0],
@@ -31,6 +29,8 @@ def plot_clusters(self, features_reduced, results):
             
     def plot_comparison(self, features_reduced, results):
         """Create comparison plot of all clustering methods."""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(20, 5))
         for idx, (method, labels) in enumerate(results.items(), 1):
             plt.subplot(1, 4, idx)
@@ -43,6 +43,8 @@ def plot_comparison(self, features_reduced, results):
         
     def plot_evaluation(self, scores):
         """Plot evaluation metrics."""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 5))
         plt.bar(scores.keys(), scores.values())
         plt.title('Clustering Quality (Silhouette Score)')
@@ -56,6 +58,9 @@ def __init__(self, output_dir='results'):
         
     def plot_model_comparison(self, analysis_results):
         """Plot comprehensive model comparison"""
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
         # Create comparison plots for each metric
         metrics = ['Silhouette Score', 'Calinski-Harabasz Score', 'Davies-Bouldin Score']
         
@@ -85,6 +90,8 @@ def plot_model_comparison(self, analysis_results):
         
     def plot_clustering_results(self, features_reduced, labels, model_name, method_name):
         """Plot interactive clustering results"""
+        import plotly.express as px
+
         df = pd.DataFrame({
             'PC1': features_reduced[:, 0],
             'PC2': features_reduced[:, 1],